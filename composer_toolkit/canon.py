@@ -3,13 +3,14 @@ Functions for generating canonic constructions from pitch and rhythm sequences.
 """
 
 import enum
-from copy import deepcopy
 from music21 import duration
 from music21 import note
 from music21 import stream
 from music21 import pitch
 from music21 import chord
 
+from composer_toolkit import tools
+
 
 class FramingType(enum.Enum):
     """
@@ -37,7 +38,7 @@ def canonize(
     """
 
     if not in_place:
-        streams = deepcopy(streams)
+        streams = tuple(tools.clone(s) for s in streams)
 
     counter = 1
 
@@ -1,6 +1,5 @@
 import enum
 import numbers
-from copy import deepcopy
 from typing import Union, Sequence, Optional
 from music21 import duration
 from music21 import note
@@ -8,6 +7,8 @@ from music21 import stream
 from music21 import pitch
 from music21 import chord
 
+from composer_toolkit import tools
+
 def hocket_melody(
     num_voices: int,
     melody: stream.Stream
@@ -25,10 +26,10 @@ def hocket_melody(
     streams = [stream.Stream() for _ in range(num_voices)]
     
     for i, n in enumerate(melody.notes):
-        streams[i % num_voices].append(deepcopy(n))
+        streams[i % num_voices].append(tools.clone(n))
         # all other voices get rests
         for j in range(0, num_voices):
             if i % num_voices != j:
-                streams[j].append(note.Rest(duration=deepcopy(n.duration)))
+                streams[j].append(note.Rest(duration=tools.clone(n.duration)))
         
     return streams
\ No newline at end of file
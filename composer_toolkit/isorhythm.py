@@ -30,7 +30,6 @@ from music21 import note
 from music21 import chord
 
 from composer_toolkit import tools
-import copy
 
 __all__ = ["create_isorhythm"]
 
@@ -87,8 +86,8 @@ def create_isorhythm(
     for i in range(length):
         result_stream.append(
             note.Note(
-                pitch=copy.deepcopy(color[(i + color_offset) % len(color)]),
-                duration=copy.deepcopy(talea[(i + talea_offset) % len(talea)]),
+                pitch=tools.clone(color[(i + color_offset) % len(color)]),
+                duration=tools.clone(talea[(i + talea_offset) % len(talea)]),
             )        
         )
         
@@ -1,8 +1,9 @@
-from copy import deepcopy
 from typing import List
 from music21.note import Lyric
 from music21 import stream
 
+from composer_toolkit import tools
+
 
 def text_to_lyrics(text: str) -> List[Lyric]:
     """Converts a string of text into a list of music21 lyrics. It does this by splitting the text into syllables and then converting each syllable into a lyric.
@@ -48,7 +49,7 @@ def apply_lyrics_to_stream(melody: stream.Stream, lyrics: Lyric, min_lyric_inter
     """
     
     if not in_place:
-        melody = deepcopy(melody)
+        melody = tools.clone(melody)
     
     i = 0
     skip = False
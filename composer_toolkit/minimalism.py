@@ -22,20 +22,60 @@ This file incorporates and extends code covered by the following license:
 import math
 import copy
 import enum
-from typing import Optional, Union, Sequence
+import functools
+import inspect
+import itertools
+import time
+import concurrent.futures
+from typing import (
+    Callable,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Mapping,
+    NamedTuple,
+    Optional,
+    Union,
+    Sequence,
+    Tuple,
+)
 
+import numpy as np
+from music21 import chord
+from music21 import freezeThaw
+from music21 import note
+from music21 import sites
 from music21 import stream
+from music21.common.numberTools import opFrac
+from music21.common.types import OffsetQL
 
 from composer_toolkit import sequences
 from composer_toolkit import tools
 
 
+# Number of iterations whose boundaries are computed at once by lazy processes.
+_CHUNK_SIZE = 1024
+
 __all__ = [
     "Direction",
     "StepMode",
     "additive_process",
     "subtractive_process",
     "scanning_process",
+    "iter_additive_process",
+    "iter_subtractive_process",
+    "iter_scanning_process",
+    "ProcessSize",
+    "IterationTrace",
+    "additive_process_size",
+    "subtractive_process_size",
+    "ProcessMap",
+    "additive_process_map",
+    "subtractive_process_map",
+    "nested_process",
+    "synchronized_process",
+    "sweep_process",
 ]
 
 
@@ -68,6 +108,40 @@ class StepMode(enum.Enum):
     ABSOLUTE = 2
 
 
+class ProcessSize(NamedTuple):
+    """
+    Size of the result of a minimalism process.
+
+    iterations is the number of iterations included in the result, notes the total number of
+    notes and quarter_length the total duration of the result.
+    """
+
+    iterations: int
+    notes: int
+    quarter_length: OffsetQL
+
+
+class IterationTrace(NamedTuple):
+    """
+    Report on one iteration of a minimalism process, passed to the tracer of the process.
+
+    index is the position of the iteration in the result, ranges the (start, end) index ranges
+    of the original notes it plays, repetitions the number of times they are played, notes the
+    number of notes added to the result and offset the offset at which the iteration ends.
+    plan_time, copy_time and insert_time are the seconds spent computing the iteration, copying
+    its notes and inserting them into the result.
+    """
+
+    index: int
+    ranges: Tuple[Tuple[int, int], ...]
+    repetitions: int
+    notes: int
+    offset: OffsetQL
+    plan_time: float
+    copy_time: float
+    insert_time: float
+
+
 def additive_process(
     original_stream: stream.Stream,
     direction: Direction = Direction.FORWARD,
@@ -76,6 +150,8 @@ def additive_process(
     repetitions: Union[int, Sequence[int]] = 1,
     iterations_start: Optional[int] = None,
     iterations_end: Optional[int] = None,
+    shared: bool = False,
+    tracer: Optional[Callable[[IterationTrace], None]] = None,
 ) -> stream.Stream:
     """Applies an additive process to a stream.
 
@@ -101,112 +177,44 @@ def additive_process(
           additive processes start at iteration 1.
         iterations_end: Optional; Stops the process at the specified iteration. By default, the
           process runs until the original stream is completed or an infinite loop is detected.
+        shared: Optional; If true, the notes of the result share their pitch and duration objects
+          with every other occurrence of the same original note instead of being deep copies,
+          which is much faster and lighter for long processes. The result must then be treated as
+          read-only. Default is False.
+        tracer: Optional; A function called with an IterationTrace after each iteration is added
+          to the result, reporting its segment, notes, offset and the time spent on it. Tracing
+          adds no cost when no tracer is given.
     Returns:
         The new stream created by the additive process.
     """
 
-    # Check step type and initialize step sequence.
-    if isinstance(step_value, int):
-        step_sequence = [step_value]
-    elif isinstance(step_value, Sequence):
-        step_sequence = step_value
-    step_index = 0
-
-    # Check repetitions type and initialize repetitions sequence.
-    if isinstance(repetitions, int):
-        repetitions_sequence = [repetitions]
-    elif isinstance(repetitions, Sequence):
-        repetitions_sequence = repetitions
-    repetitions_index = 0
-
-    # Initialize function variables.
-    post_stream = stream.Stream()
-    original_notes = original_stream.flat.notes
-    original_length = len(original_notes)
-    iteration_index = 0
-    position1 = 0
-    position2 = 0
-    current_length = step_sequence[0]
-    completed = False
-
-    while not completed:
-        current_stream = stream.Stream()
-
-        # Determine boundaries of segment to use for the current iteration, depending on direction.
-        if direction is Direction.FORWARD:
-            position1 = 0
-            position2 = current_length
-            if position2 > original_length:
-                position2 = original_length
-            if iterations_end is None and position2 == original_length:
-                completed = True
-        elif direction is Direction.BACKWARD:
-            position1 = original_length - current_length
-            position2 = original_length
-            if position1 < 0:
-                position1 = 0
-            if iterations_end is None and position1 == 0:
-                completed = True
-        elif direction is Direction.INWARD:
-            position1 = current_length
-            position2 = original_length - current_length
-            if position1 >= position2:
-                position1 = position2
-            if iterations_end is None and position1 == position2:
-                completed = True
-        elif direction is Direction.OUTWARD:
-            position1 = math.floor(original_length / 2.0 - current_length)
-            position2 = math.floor(original_length / 2.0 + current_length)
-            if position1 < 0:
-                position1 = 0
-            if position2 > original_length:
-                position2 = original_length
-            if (
-                iterations_end is None
-                and position1 == 0
-                and position2 == original_length
-            ):
-                completed = True
-
-        # Build the current iteration, repeating the segment the amount of times defined
-        # #by the repetitions sequence.
-        if iterations_start is None or iteration_index + 1 >= iterations_start:
-            for _ in range(repetitions_sequence[repetitions_index]):
-                if direction == Direction.INWARD:
-                    for i in range(0, position1):
-                        current_stream.append(copy.deepcopy(original_notes[i]))
-                    for i in range(position2, original_length):
-                        current_stream.append(copy.deepcopy(original_notes[i]))
-                else:
-                    for i in range(position1, position2):
-                        current_stream.append(copy.deepcopy(original_notes[i]))
-
-        # Add iteration to final sequence.
-        tools.append_stream(post_stream, current_stream)
-
-        # Increment iteration index, stopping if iterations parameter has been set and reached.
-        iteration_index += 1
-        if iterations_end is not None and iteration_index == iterations_end:
-            completed = True
-
-        # Increment step and repetition indexes, looping if the end of the sequence is reached.
-        step_index += 1
-        if step_index > len(step_sequence) - 1:
-            step_index = 0
-            # Infinite loop check
-            if iterations_end is None and step_mode == StepMode.ABSOLUTE:
-                completed = True
-        repetitions_index += 1
-        if repetitions_index > len(repetitions_sequence) - 1:
-            repetitions_index = 0
-
-        # Update segment length
-        if step_mode == StepMode.RELATIVE:
-            current_length += step_sequence[step_index]
-        elif step_mode == StepMode.ABSOLUTE:
-            current_length = step_sequence[step_index]
-
-    return post_stream
+    original_notes = list(original_stream.flatten().notes)
+    if tracer is not None:
+        segments = _process_segments(
+            len(original_notes),
+            direction,
+            step_value,
+            step_mode,
+            repetitions,
+            iterations_start,
+            iterations_end,
+            subtractive=False,
+        )
+        iterations = _segment_ranges(
+            segments, _is_complement(direction, False), len(original_notes)
+        )
+        return _traced_stream(iterations, original_notes, shared, tracer)
+    plan = _build_plan(
+        len(original_notes),
+        direction,
+        step_value,
+        step_mode,
+        repetitions,
+        iterations_start,
+        iterations_end,
+        subtractive=False,
+    )
+    return _materialize_plan(plan, original_notes, shared)
 
 
 def subtractive_process(
@@ -217,6 +225,8 @@ def subtractive_process(
     repetitions: Union[int, Sequence[int]] = 1,
     iterations_start: Optional[int] = None,
     iterations_end: Optional[int] = None,
+    shared: bool = False,
+    tracer: Optional[Callable[[IterationTrace], None]] = None,
 ) -> stream.Stream:
     """Applies an subtractive process to a stream.
 
@@ -244,92 +254,800 @@ def subtractive_process(
           stops. By default, the process runs until the original stream disappears. Note that the
           subtractive process starts with the complete stream, so the first iteration results in
           the second segment.
+        shared: Optional; If true, the notes of the result share their pitch and duration objects
+          with every other occurrence of the same original note instead of being deep copies,
+          which is much faster and lighter for long processes. The result must then be treated as
+          read-only. Default is False.
+        tracer: Optional; A function called with an IterationTrace after each iteration is added
+          to the result, reporting its segment, notes, offset and the time spent on it. Tracing
+          adds no cost when no tracer is given.
 
     Returns:
         The new stream created by the subtractive process.
 
     """
 
-    # Check step type and initialize step sequence.
-    if isinstance(step_value, int):
-        step_sequence = [step_value]
-    elif isinstance(step_value, Sequence):
-        step_sequence = step_value
-    step_index = -1
-
-    # Check repetitions type and initialize repetitions sequence.
-    if isinstance(repetitions, int):
-        repetitions_sequence = [repetitions]
-    elif isinstance(repetitions, Sequence):
-        repetitions_sequence = repetitions
-    repetitions_index = 0
+    original_notes = list(original_stream.flatten().notes)
+    if tracer is not None:
+        segments = _process_segments(
+            len(original_notes),
+            direction,
+            step_value,
+            step_mode,
+            repetitions,
+            iterations_start,
+            iterations_end,
+            subtractive=True,
+        )
+        iterations = _segment_ranges(
+            segments, _is_complement(direction, True), len(original_notes)
+        )
+        return _traced_stream(iterations, original_notes, shared, tracer)
+    plan = _build_plan(
+        len(original_notes),
+        direction,
+        step_value,
+        step_mode,
+        repetitions,
+        iterations_start,
+        iterations_end,
+        subtractive=True,
+    )
+    return _materialize_plan(plan, original_notes, shared)
 
-    # Initialize function variables.
-    post_stream = stream.Stream()
-    original_notes = original_stream.flat.notes
-    original_length = len(original_notes)
-    iteration_index = -1
-    position1 = 0
-    position2 = 0
-    current_length = 0
-    completed = False
 
-    while not completed:
-        current_stream = stream.Stream()
+def scanning_process(
+    original_stream: stream.Stream,
+    direction: Direction = Direction.FORWARD,
+    step_value: Union[int, Sequence[int]] = 1,
+    step_mode: StepMode = StepMode.RELATIVE,
+    window_size: Union[int, Sequence[int]] = 2,
+    repetitions: Union[int, Sequence[int]] = 1,
+    iterations_start: Optional[int] = None,
+    iterations_end: Optional[int] = None,
+    shared: bool = False,
+    tracer: Optional[Callable[[IterationTrace], None]] = None,
+) -> stream.Stream:
+    """Applies a scanning process to a stream.
+
+    Builds a new stream by applying a scanning process to the original stream: a "window" moves
+    across the original stream, and the notes it contains at each iteration are added to the new
+    stream. Only note and chord objects are included. Provided a stream of 6 elements, in FORWARD
+    direction, with a step_value of 1 and a window_size of 2, this function will return a stream
+    composed of: 12|23|34|45|56|6. With step_value=sequences.PRIMES in ABSOLUTE mode, the window
+    starts at positions 0, 2, 3, 5, and the result is 12|34|45|6.
+
+    In INWARD direction, two windows start from the extremities of the stream and move towards
+    the middle (12 56|23 45|34 for the example above); in OUTWARD direction, they start from the
+    middle and move towards the extremities (23 45|12 56|1 6).
+
+    Args:
+        original_stream: The original stream to process.
+        direction: Optional; The direction of the scanning process. Default is Direction.FORWARD.
+        step_value: Optional; Determines the number of elements the window moves each iteration.
+          Default is 1. If provided a sequence of numbers (for example, sequences.PRIMES), the
+          step parameter will cycle through the sequence each iteration, looping if it reaches
+          the end of the sequence.
+        step_mode: Optional; Determines the step mode. In RELATIVE mode, step determines the
+          amount of elements the window moves relative to its previous position. In ABSOLUTE
+          mode, step determines the position of the window relative to the starting point.
+        window_size: Optional; Determines the number of elements in the window. Default is 2.
+          If provided a sequence of numbers, the window size will cycle through the sequence each
+          iteration, looping if it reaches the end of the sequence.
+        repetitions: Optional; Determines the number of times each window is repeated before
+          moving to the next iteration. Default is 1. If provided a sequence of numbers (for
+          example, sequences.PRIMES), the repetitions parameter will cycle through the sequence
+          each iteration, looping if it reaches the end of the sequence.
+        iterations_start: Optional; Starts the process at the specified iteration. By default,
+          scanning processes start at iteration 1.
+        iterations_end: Optional; Stops the process at the specified iteration. By default, the
+          process runs until the original stream is entirely traversed, or until the end of the
+          step sequence in ABSOLUTE mode.
+        shared: Optional; If true, the notes of the result share their pitch and duration objects
+          with every other occurrence of the same original note instead of being deep copies.
+          The result must then be treated as read-only. Default is False.
+        tracer: Optional; A function called with an IterationTrace after each iteration is added
+          to the result, reporting its segment, notes, offset and the time spent on it. Tracing
+          adds no cost when no tracer is given.
+
+    Returns:
+        The new stream created by the scanning process.
+
+    Raises:
+        ValueError: If step_value contains negative steps in RELATIVE mode, or only zero steps
+          while iterations_end is not set.
+    """
+    original_notes = list(original_stream.flatten().notes)
+    iterations = _scanning_iterations(
+        len(original_notes),
+        direction,
+        step_value,
+        step_mode,
+        window_size,
+        repetitions,
+        iterations_start,
+        iterations_end,
+    )
+    if tracer is not None:
+        return _traced_stream(iterations, original_notes, shared, tracer)
+    return _events_to_stream(_iter_ranges(iterations, original_notes, shared))
+
+
+def iter_additive_process(
+    original_stream: stream.Stream,
+    direction: Direction = Direction.FORWARD,
+    step_value: Union[int, Sequence[int]] = 1,
+    step_mode: StepMode = StepMode.RELATIVE,
+    repetitions: Union[int, Sequence[int]] = 1,
+    iterations_start: Optional[int] = None,
+    iterations_end: Optional[int] = None,
+    shared: bool = False,
+) -> Iterator[Tuple[OffsetQL, note.GeneralNote]]:
+    """Lazily applies an additive process to a stream.
+
+    Streaming counterpart of additive_process: rather than building the resulting stream, yields
+    the notes of the process one at a time, as they are produced, along with their offset in the
+    result. Iterations are computed as they are reached, so memory use does not depend on the
+    length of the process.
+
+    Args:
+        The arguments are the same as for additive_process.
+
+    Yields:
+        Tuples of (offset, note), in order, where note is a new copy of an original note, or a
+        shared-payload copy if shared is True.
+    """
+    original_notes = list(original_stream.flatten().notes)
+    segments = _process_segments(
+        len(original_notes),
+        direction,
+        step_value,
+        step_mode,
+        repetitions,
+        iterations_start,
+        iterations_end,
+        subtractive=False,
+    )
+    iterations = _segment_ranges(
+        segments, _is_complement(direction, False), len(original_notes)
+    )
+    yield from _iter_ranges(iterations, original_notes, shared)
+
+
+def iter_subtractive_process(
+    original_stream: stream.Stream,
+    direction: Direction = Direction.FORWARD,
+    step_value: Union[int, Sequence[int]] = 1,
+    step_mode: StepMode = StepMode.RELATIVE,
+    repetitions: Union[int, Sequence[int]] = 1,
+    iterations_start: Optional[int] = None,
+    iterations_end: Optional[int] = None,
+    shared: bool = False,
+) -> Iterator[Tuple[OffsetQL, note.GeneralNote]]:
+    """Lazily applies a subtractive process to a stream.
+
+    Streaming counterpart of subtractive_process: rather than building the resulting stream,
+    yields the notes of the process one at a time, as they are produced, along with their offset
+    in the result. Iterations are computed as they are reached, so memory use does not depend on
+    the length of the process.
+
+    Args:
+        The arguments are the same as for subtractive_process.
+
+    Yields:
+        Tuples of (offset, note), in order, where note is a new copy of an original note, or a
+        shared-payload copy if shared is True.
+    """
+    original_notes = list(original_stream.flatten().notes)
+    segments = _process_segments(
+        len(original_notes),
+        direction,
+        step_value,
+        step_mode,
+        repetitions,
+        iterations_start,
+        iterations_end,
+        subtractive=True,
+    )
+    iterations = _segment_ranges(
+        segments, _is_complement(direction, True), len(original_notes)
+    )
+    yield from _iter_ranges(iterations, original_notes, shared)
+
+
+def iter_scanning_process(
+    original_stream: stream.Stream,
+    direction: Direction = Direction.FORWARD,
+    step_value: Union[int, Sequence[int]] = 1,
+    step_mode: StepMode = StepMode.RELATIVE,
+    window_size: Union[int, Sequence[int]] = 2,
+    repetitions: Union[int, Sequence[int]] = 1,
+    iterations_start: Optional[int] = None,
+    iterations_end: Optional[int] = None,
+    shared: bool = False,
+) -> Iterator[Tuple[OffsetQL, note.GeneralNote]]:
+    """Lazily applies a scanning process to a stream.
+
+    Streaming counterpart of scanning_process: rather than building the resulting stream, yields
+    the notes of the process one at a time, as they are produced, along with their offset in the
+    result. Iterations are computed as they are reached, so memory use does not depend on the
+    length of the process.
+
+    Args:
+        The arguments are the same as for scanning_process.
+
+    Yields:
+        Tuples of (offset, note), in order, where note is a new copy of an original note, or a
+        shared-payload copy if shared is True.
+
+    Raises:
+        ValueError: If step_value contains negative steps in RELATIVE mode, or only zero steps
+          while iterations_end is not set.
+    """
+    original_notes = list(original_stream.flatten().notes)
+    iterations = _scanning_iterations(
+        len(original_notes),
+        direction,
+        step_value,
+        step_mode,
+        window_size,
+        repetitions,
+        iterations_start,
+        iterations_end,
+    )
+    yield from _iter_ranges(iterations, original_notes, shared)
+
+
+def additive_process_size(
+    original_stream: stream.Stream,
+    direction: Direction = Direction.FORWARD,
+    step_value: Union[int, Sequence[int]] = 1,
+    step_mode: StepMode = StepMode.RELATIVE,
+    repetitions: Union[int, Sequence[int]] = 1,
+    iterations_start: Optional[int] = None,
+    iterations_end: Optional[int] = None,
+) -> ProcessSize:
+    """Computes the size of the result of an additive process without building it.
+
+    The computation only depends on the number of iterations of the process, not on the number
+    of notes in the result.
+
+    Args:
+        The arguments are the same as for additive_process.
+
+    Returns:
+        The number of iterations, notes and the total quarter length of the result.
+    """
+    original_notes = list(original_stream.flatten().notes)
+    plan = _build_plan(
+        len(original_notes),
+        direction,
+        step_value,
+        step_mode,
+        repetitions,
+        iterations_start,
+        iterations_end,
+        subtractive=False,
+    )
+    return _plan_size(plan, original_notes)
+
+
+def subtractive_process_size(
+    original_stream: stream.Stream,
+    direction: Direction = Direction.FORWARD,
+    step_value: Union[int, Sequence[int]] = 1,
+    step_mode: StepMode = StepMode.RELATIVE,
+    repetitions: Union[int, Sequence[int]] = 1,
+    iterations_start: Optional[int] = None,
+    iterations_end: Optional[int] = None,
+) -> ProcessSize:
+    """Computes the size of the result of a subtractive process without building it.
+
+    The computation only depends on the number of iterations of the process, not on the number
+    of notes in the result.
+
+    Args:
+        The arguments are the same as for subtractive_process.
+
+    Returns:
+        The number of iterations, notes and the total quarter length of the result.
+    """
+    original_notes = list(original_stream.flatten().notes)
+    plan = _build_plan(
+        len(original_notes),
+        direction,
+        step_value,
+        step_mode,
+        repetitions,
+        iterations_start,
+        iterations_end,
+        subtractive=True,
+    )
+    return _plan_size(plan, original_notes)
+
+
+class ProcessMap:
+    """
+    Random-access view of an additive or subtractive process.
+
+    The segment plan of the process is computed once, along with the offset of each iteration,
+    so that any iteration, or the notes between two offsets, can be built without generating
+    the rest of the process. Create instances with additive_process_map or
+    subtractive_process_map.
+    """
+
+    def __init__(
+        self, original_stream: stream.Stream, plan: "_SegmentPlan"
+    ) -> None:
+        self._plan = plan
+        self._prototypes = [
+            _detached_copy(note_) for note_ in original_stream.flatten().notes
+        ]
+        self._prefix = _duration_prefix(self._prototypes)
+        self._segment_durations = []
+        self._offsets = [0.0]
+        for start, end, repeats in plan.segments():
+            segment_duration = self._prefix[end] - self._prefix[start]
+            if plan.complement:
+                segment_duration = self._prefix[-1] - segment_duration
+            self._segment_durations.append(opFrac(segment_duration))
+            self._offsets.append(opFrac(self._offsets[-1] + segment_duration * repeats))
+        self._float_offsets = np.array(self._offsets, dtype=np.float64)
+
+    def __len__(self) -> int:
+        """Returns the number of iterations of the process."""
+        return len(self._plan.starts)
+
+    @property
+    def quarter_length(self) -> OffsetQL:
+        """The total duration of the process."""
+        return self._offsets[-1]
+
+    def iteration_offset(self, iteration: int) -> OffsetQL:
+        """Returns the offset at which an iteration starts in the result of the process.
+
+        Args:
+            iteration: The index of the iteration, starting at 0.
+        """
+        return self._offsets[self._check_iteration(iteration)]
+
+    def iteration(self, iteration: int, shared: bool = False) -> stream.Stream:
+        """Builds a single iteration of the process.
+
+        Args:
+            iteration: The index of the iteration, starting at 0.
+            shared: Optional; If true, repeated notes share their pitch and duration objects,
+              as in additive_process. Default is False.
+
+        Returns:
+            A new stream containing the iteration, repetitions included, starting at offset 0.
+        """
+        iteration = self._check_iteration(iteration)
+        iterations = _segment_ranges(
+            [self._segment(iteration)], self._plan.complement, self._plan.original_length
+        )
+        return _events_to_stream(
+            _iter_prototype_ranges(iterations, self._prototypes, self._prefix, shared)
+        )
 
-        # Determine boundaries of segment to use for the current iteration, depending on direction.
-        if direction is Direction.FORWARD:
-            position1 = current_length
+    def notes_between(
+        self, offset_start: OffsetQL, offset_end: OffsetQL, shared: bool = False
+    ) -> stream.Stream:
+        """Builds the notes of the process that start between two offsets.
+
+        Args:
+            offset_start: The offset from which notes are included.
+            offset_end: The offset before which notes are included.
+            shared: Optional; If true, repeated notes share their pitch and duration objects,
+              as in additive_process. Default is False.
+
+        Returns:
+            A new stream containing the notes starting in [offset_start, offset_end), at their
+            offsets in the result of the process.
+        """
+        offset_start = opFrac(offset_start)
+        offset_end = opFrac(offset_end)
+        # Find the iteration containing offset_start, then skip its repetitions that end
+        # before offset_start.
+        first = int(np.searchsorted(self._float_offsets, float(offset_start), "right")) - 1
+        first = max(first, 0)
+        if first >= len(self) or offset_end <= offset_start:
+            return stream.Stream()
+        start, end, repeats = self._segment(first)
+        offset = self._offsets[first]
+        segment_duration = self._segment_durations[first]
+        if segment_duration > 0 and offset_start > offset:
+            skipped = min(int((offset_start - offset) // segment_duration), repeats)
+            repeats -= skipped
+            offset = opFrac(offset + segment_duration * skipped)
+
+        segments = itertools.chain(
+            [(start, end, repeats)],
+            (self._segment(i) for i in range(first + 1, len(self))),
+        )
+        iterations = _segment_ranges(
+            segments, self._plan.complement, self._plan.original_length
+        )
+        events = _iter_prototype_ranges(
+            iterations, self._prototypes, self._prefix, shared, offset
+        )
+        return _events_to_stream(
+            (offset_, note_)
+            for offset_, note_ in itertools.takewhile(
+                lambda event: event[0] < offset_end, events
+            )
+            if offset_ >= offset_start
+        )
+
+    def _segment(self, iteration: int) -> Tuple[int, int, int]:
+        return (
+            int(self._plan.starts[iteration]),
+            int(self._plan.ends[iteration]),
+            int(self._plan.repetitions[iteration]),
+        )
+
+    def _check_iteration(self, iteration: int) -> int:
+        if iteration < 0:
+            iteration += len(self)
+        if not 0 <= iteration < len(self):
+            raise IndexError(f"iteration {iteration} out of range")
+        return iteration
+
+
+def additive_process_map(
+    original_stream: stream.Stream,
+    direction: Direction = Direction.FORWARD,
+    step_value: Union[int, Sequence[int]] = 1,
+    step_mode: StepMode = StepMode.RELATIVE,
+    repetitions: Union[int, Sequence[int]] = 1,
+    iterations_start: Optional[int] = None,
+    iterations_end: Optional[int] = None,
+) -> ProcessMap:
+    """Creates a random-access view of an additive process.
+
+    Args:
+        The arguments are the same as for additive_process.
+
+    Returns:
+        A ProcessMap giving access to individual iterations of the process, or to the notes
+        between two offsets.
+    """
+    plan = _build_plan(
+        len(original_stream.flatten().notes),
+        direction,
+        step_value,
+        step_mode,
+        repetitions,
+        iterations_start,
+        iterations_end,
+        subtractive=False,
+    )
+    return ProcessMap(original_stream, plan)
+
+
+def subtractive_process_map(
+    original_stream: stream.Stream,
+    direction: Direction = Direction.FORWARD,
+    step_value: Union[int, Sequence[int]] = 1,
+    step_mode: StepMode = StepMode.RELATIVE,
+    repetitions: Union[int, Sequence[int]] = 1,
+    iterations_start: Optional[int] = None,
+    iterations_end: Optional[int] = None,
+) -> ProcessMap:
+    """Creates a random-access view of a subtractive process.
+
+    Args:
+        The arguments are the same as for subtractive_process.
+
+    Returns:
+        A ProcessMap giving access to individual iterations of the process, or to the notes
+        between two offsets.
+    """
+    plan = _build_plan(
+        len(original_stream.flatten().notes),
+        direction,
+        step_value,
+        step_mode,
+        repetitions,
+        iterations_start,
+        iterations_end,
+        subtractive=True,
+    )
+    return ProcessMap(original_stream, plan)
+
+
+def nested_process(
+    original_stream: stream.Stream,
+    *processes: Callable[..., stream.Stream],
+    shared: bool = False,
+) -> stream.Stream:
+    """Applies nested minimalism processes to a stream in a single pass.
+
+    Equivalent to applying each process to the result of the previous one, for example
+    additive_process(additive_process(original_stream)), without building the intermediate
+    streams. Each process is reduced to a map from the indices of its output notes to the
+    indices of its input notes; the maps are composed, and the final stream is built directly
+    from the original notes.
+
+    Args:
+        original_stream: The original stream to process.
+        *processes: The processes to apply, innermost first. Each process is additive_process,
+          subtractive_process or scanning_process, or a functools.partial of one of them with
+          keyword arguments, for example
+          functools.partial(subtractive_process, direction=Direction.BACKWARD).
+        shared: Optional; If true, the notes of the result share their pitch and duration objects
+          with every other occurrence of the same original note instead of being deep copies.
+          The result must then be treated as read-only. Default is False.
+
+    Returns:
+        The new stream created by the nested processes.
+
+    Raises:
+        TypeError: If a process is not one of the minimalism processes, or is given positional
+          arguments or a tracer.
+    """
+    original_notes = list(original_stream.flatten().notes)
+    index_map = np.arange(len(original_notes), dtype=np.int64)
+    for process in processes:
+        index_map = index_map[_process_index_map(process, len(index_map))]
+
+    prototypes = [_detached_copy(note_) for note_ in original_notes]
+    return _materialize_index_map(index_map, prototypes, shared)
+
+
+def synchronized_process(
+    voices: Sequence[stream.Stream],
+    process: Callable[..., stream.Stream],
+    shared: bool = False,
+) -> List[stream.Stream]:
+    """Applies the same minimalism process to several aligned voices.
+
+    The voices are divided into time slots, one for each distinct offset at which a note starts
+    in any voice. The process is planned once over the slots, and every voice is built from the
+    same plan, so the voices stay aligned even when they contain different numbers of notes.
+    Each note belongs to the slot in which it starts and keeps its duration; a voice with no note
+    starting in a slot is silent for the duration of that slot.
+
+    For a single voice in which every note starts when the previous one ends, the result is the
+    same as applying the process directly.
+
+    Args:
+        voices: The voices to process, for example a melody and its tintinnabuli voice.
+        process: The process to apply: additive_process, subtractive_process or
+          scanning_process, or a functools.partial of one of them with keyword arguments.
+        shared: Optional; If true, the notes of the results share their pitch and duration
+          objects with every other occurrence of the same original note instead of being deep
+          copies. The results must then be treated as read-only. Default is False.
+
+    Returns:
+        A list of new streams, one for each voice, in the order of the voices.
+
+    Raises:
+        TypeError: If the process is not one of the minimalism processes, or is given positional
+          arguments or a tracer.
+    """
+    voice_notes = []
+    for voice in voices:
+        flat_voice = voice.flatten()
+        voice_notes.append([(flat_voice.elementOffset(n), n) for n in flat_voice.notes])
+
+    slot_offsets = sorted({offset for notes in voice_notes for offset, _ in notes})
+    end = max(
+        (opFrac(offset + n.duration.quarterLength) for notes in voice_notes for offset, n in notes),
+        default=0.0,
+    )
+    slot_durations = [
+        opFrac(following - offset)
+        for offset, following in zip(slot_offsets, slot_offsets[1:] + [end])
+    ]
+    slot_indices = {offset: index for index, offset in enumerate(slot_offsets)}
+    index_map = _process_index_map(process, len(slot_offsets)).tolist()
+
+    clone = _shared_copy if shared else tools.clone
+    post_streams = []
+    for notes in voice_notes:
+        slots = [[] for _ in slot_offsets]
+        for offset, note_ in notes:
+            slots[slot_indices[offset]].append(_detached_copy(note_))
+        post_stream = stream.Stream()
+        offset = 0.0
+        for index in index_map:
+            for note_ in slots[index]:
+                post_stream.coreInsert(offset, clone(note_), ignoreSort=True)
+            offset = opFrac(offset + slot_durations[index])
+        post_stream.coreElementsChanged()
+        post_streams.append(post_stream)
+    return post_streams
+
+
+def sweep_process(
+    original_stream: stream.Stream,
+    process: Callable[..., stream.Stream],
+    parameter_grid: Mapping[str, Sequence],
+    summarize: bool = False,
+    max_workers: Optional[int] = None,
+) -> List[Tuple[Dict[str, object], Union[stream.Stream, ProcessSize]]]:
+    """Runs a minimalism process for every combination of a grid of parameters.
+
+    The runs are distributed across a pool of worker processes. The notes of the original stream
+    are extracted once and sent to each worker when it starts, rather than with every run.
+
+    Args:
+        original_stream: The original stream to process.
+        process: The process to run: additive_process, subtractive_process or scanning_process,
+          or a functools.partial of one of them with keyword arguments shared by all runs.
+        parameter_grid: A mapping of keyword argument names to sequences of values, for example
+          {"direction": list(Direction), "step_value": [1, 2, sequences.PRIMES]}. The process is
+          run for every combination of values.
+        summarize: Optional; If true, each run returns the ProcessSize of its result instead of
+          the result itself, and no stream is built or sent back. Default is False.
+        max_workers: Optional; The number of worker processes. By default, as many as the
+          machine has processors.
+
+    Returns:
+        A list of (parameters, result) tuples, one for each combination of parameters, in the
+        order of the grid: the values of the last parameter vary fastest.
+    """
+    names = list(parameter_grid)
+    combinations = [
+        dict(zip(names, values))
+        for values in itertools.product(*(parameter_grid[name] for name in names))
+    ]
+    # Validate the process and arguments before starting any worker.
+    for parameters in combinations:
+        _process_arguments(process, parameters)
+
+    prototypes = [_detached_copy(note_) for note_ in original_stream.flatten().notes]
+    tasks = [(process, parameters, summarize) for parameters in combinations]
+    with concurrent.futures.ProcessPoolExecutor(
+        max_workers=max_workers, initializer=_init_sweep_worker, initargs=(prototypes,)
+    ) as executor:
+        results = list(executor.map(_run_sweep_task, tasks))
+    if not summarize:
+        results = [_thaw_stream(data) for data in results]
+    return list(zip(combinations, results))
+
+
+class _SegmentPlan(NamedTuple):
+    """Index plan of an additive or subtractive process.
+
+    Each entry of the arrays describes one iteration of the process that is part of the output:
+    the boundaries of the segment of original notes it uses and the number of times the segment
+    is repeated. When complement is True, the segment consists of the notes outside of the
+    boundaries rather than the notes between them.
+    """
+
+    starts: np.ndarray
+    ends: np.ndarray
+    repetitions: np.ndarray
+    complement: bool
+    original_length: int
+
+    def segments(self) -> Iterator[Tuple[int, int, int]]:
+        """Iterates over the (start, end, repetitions) entries of the plan."""
+        return zip(self.starts.tolist(), self.ends.tolist(), self.repetitions.tolist())
+
+    def segment_lengths(self) -> np.ndarray:
+        """Returns the number of notes in the segment of each iteration."""
+        lengths = self.ends - self.starts
+        if self.complement:
+            return self.original_length - lengths
+        return lengths
+
+
+def _to_sequence(value: Union[int, Sequence[int]]) -> Sequence[int]:
+    if isinstance(value, int):
+        return [value]
+    return value
+
+
+def _build_plan(
+    original_length: int,
+    direction: Direction,
+    step_value: Union[int, Sequence[int]],
+    step_mode: StepMode,
+    repetitions: Union[int, Sequence[int]],
+    iterations_start: Optional[int],
+    iterations_end: Optional[int],
+    subtractive: bool,
+) -> _SegmentPlan:
+    starts, ends, repeats = [], [], []
+    for start, end, repeat in _process_segments(
+        original_length,
+        direction,
+        step_value,
+        step_mode,
+        repetitions,
+        iterations_start,
+        iterations_end,
+        subtractive,
+    ):
+        starts.append(start)
+        ends.append(end)
+        repeats.append(repeat)
+    return _SegmentPlan(
+        np.array(starts, dtype=np.int64),
+        np.array(ends, dtype=np.int64),
+        np.array(repeats, dtype=np.int64),
+        _is_complement(direction, subtractive),
+        original_length,
+    )
+
+
+def _is_complement(direction: Direction, subtractive: bool) -> bool:
+    # Additive INWARD and subtractive OUTWARD processes use the notes outside of the segment.
+    if subtractive:
+        return direction is Direction.OUTWARD
+    return direction is Direction.INWARD
+
+
+def _segment_boundaries(
+    original_length: int,
+    direction: Direction,
+    current_length: int,
+    subtractive: bool,
+) -> Tuple[int, int, bool]:
+    # Returns the boundaries of the segment for the current length, and whether the process has
+    # reached the end of the original stream.
+    if direction is Direction.FORWARD:
+        if subtractive:
+            position1 = min(current_length, original_length)
             position2 = original_length
-            if position1 >= original_length:
-                position1 = original_length
-            if iterations_end is None and position1 == original_length:
-                completed = True
-        elif direction is Direction.BACKWARD:
+            return position1, position2, position1 == original_length
+        position1 = 0
+        position2 = min(current_length, original_length)
+        return position1, position2, position2 == original_length
+    if direction is Direction.BACKWARD:
+        if subtractive:
             position1 = 0
-            position2 = original_length - current_length
-            if position2 <= 0:
-                position2 = 0
-            if iterations_end is None and position2 == 0:
-                completed = True
-        elif direction is Direction.INWARD:
-            position1 = current_length
-            position2 = original_length - current_length
-            if position2 < 0:
-                position2 = 0
-            if position1 >= position2:
-                position1 = position2
-            if iterations_end is None and position1 == position2:
-                completed = True
-        elif direction is Direction.OUTWARD:
-            position1 = math.floor(original_length / 2.0 - current_length)
-            position2 = math.floor(original_length / 2.0 + current_length)
-            if position1 < 0:
-                position1 = 0
-            if position2 >= original_length:
-                position2 = original_length
-            if (
-                iterations_end is None
-                and position1 == 0
-                and position2 == original_length
-            ):
-                completed = True
+            position2 = max(original_length - current_length, 0)
+            return position1, position2, position2 == 0
+        position1 = max(original_length - current_length, 0)
+        position2 = original_length
+        return position1, position2, position1 == 0
+    if direction is Direction.INWARD:
+        position2 = max(original_length - current_length, 0)
+        position1 = min(current_length, position2)
+        return position1, position2, position1 == position2
+    position1 = max(math.floor(original_length / 2.0 - current_length), 0)
+    position2 = min(math.floor(original_length / 2.0 + current_length), original_length)
+    return position1, position2, position1 == 0 and position2 == original_length
+
 
-        # Build the current iteration, repeating the segment the amount of times defined
-        # by the repetitions sequence.
+def _process_segments(
+    original_length: int,
+    direction: Direction,
+    step_value: Union[int, Sequence[int]],
+    step_mode: StepMode,
+    repetitions: Union[int, Sequence[int]],
+    iterations_start: Optional[int],
+    iterations_end: Optional[int],
+    subtractive: bool,
+) -> Iterator[Tuple[int, int, int]]:
+    step_sequence = _to_sequence(step_value)
+    repetitions_sequence = _to_sequence(repetitions)
+
+    # Subtractive processes start with the complete stream, one step behind additive processes.
+    if subtractive:
+        step_index = -1
+        current_length = 0
+    else:
+        step_index = 0
+        current_length = step_sequence[0]
+    iteration_index = step_index
+    repetitions_index = 0
+    completed = False
+
+    while not completed:
+        position1, position2, exhausted = _segment_boundaries(
+            original_length, direction, current_length, subtractive
+        )
+        if iterations_end is None and exhausted:
+            completed = True
+
+        # Yield the current iteration if it is part of the output.
         if iterations_start is None or iteration_index + 1 >= iterations_start:
-            for _ in range(repetitions_sequence[repetitions_index]):
-                if direction is Direction.OUTWARD:
-                    for i in range(0, position1):
-                        current_stream.append(copy.deepcopy(original_notes[i]))
-                    for i in range(position2, original_length):
-                        current_stream.append(copy.deepcopy(original_notes[i]))
-                else:
-                    for i in range(position1, position2):
-                        current_stream.append(copy.deepcopy(original_notes[i]))
-
-        # Add iteration to final sequence.
-        tools.append_stream(post_stream, current_stream)
+            yield position1, position2, repetitions_sequence[repetitions_index]
 
         # Increment iteration index, stopping if iterations parameter has been set and reached.
         iteration_index += 1
@@ -353,79 +1071,446 @@ def subtractive_process(
         elif step_mode == StepMode.ABSOLUTE:
             current_length = step_sequence[step_index]
 
-    return post_stream
 
+def _scanning_positions(
+    original_length: int,
+    direction: Direction,
+    step_value: Union[int, Sequence[int]],
+    step_mode: StepMode,
+    window_size: Union[int, Sequence[int]],
+    repetitions: Union[int, Sequence[int]],
+    iterations_start: Optional[int],
+    iterations_end: Optional[int],
+) -> Iterator[Tuple[int, int, int]]:
+    # Yields the position of the window, its size and its repetitions for each iteration that is
+    # part of the output.
+    step_sequence = _to_sequence(step_value)
+    window_sequence = _to_sequence(window_size)
+    repetitions_sequence = _to_sequence(repetitions)
+    if step_mode is StepMode.RELATIVE:
+        if min(step_sequence) < 0:
+            raise ValueError("step_value cannot contain negative steps in RELATIVE mode")
+        if iterations_end is None and max(step_sequence) == 0:
+            raise ValueError("step_value must contain a positive step")
 
-# !! scanning_process is in a development state !!
-def scanning_process(
-    original_stream: stream.Stream,
-    direction: Direction = Direction.FORWARD,
-    step_value: Union[int, Sequence[int]] = 1,
-    step_mode: StepMode = StepMode.RELATIVE,
-    window_size: Union[int, Sequence[int]] = 2,
-    repetitions: Union[int, Sequence[int]] = 1,
-    iterations_start: Optional[int] = None,
-    iterations_end: Optional[int] = None,
+    # In INWARD and OUTWARD directions, the two windows meet after half of the stream.
+    if direction is Direction.FORWARD or direction is Direction.BACKWARD:
+        limit = original_length
+    else:
+        limit = math.ceil(original_length / 2.0)
+
+    iteration_index = 0
+    position = 0
+    while step_mode is StepMode.ABSOLUTE or position < limit:
+        if iterations_start is None or iteration_index + 1 >= iterations_start:
+            yield (
+                position,
+                window_sequence[iteration_index % len(window_sequence)],
+                repetitions_sequence[iteration_index % len(repetitions_sequence)],
+            )
+
+        # Stop if iterations parameter has been set and reached.
+        iteration_index += 1
+        if iterations_end is not None and iteration_index == iterations_end:
+            return
+
+        # Move the window, stopping at the end of the sequence in ABSOLUTE mode.
+        step = step_sequence[(iteration_index - 1) % len(step_sequence)]
+        if step_mode is StepMode.RELATIVE:
+            position += step
+        else:
+            if iterations_end is None and iteration_index > len(step_sequence):
+                return
+            position = step
+
+
+def _window_bounds(
+    original_length: int,
+    direction: Direction,
+    positions: np.ndarray,
+    window_sizes: np.ndarray,
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    # Returns the boundaries of the two windows of each iteration. FORWARD and BACKWARD
+    # processes only use the first window, the second one being left empty.
+    if direction is Direction.FORWARD:
+        start1 = positions
+        end1 = positions + window_sizes
+        start2 = end2 = end1
+    elif direction is Direction.BACKWARD:
+        end1 = original_length - positions
+        start1 = end1 - window_sizes
+        start2 = end2 = end1
+    elif direction is Direction.INWARD:
+        end2 = original_length - positions
+        start1 = np.minimum(positions, end2)
+        end1 = np.minimum(positions + window_sizes, end2)
+        start2 = np.maximum(end2 - window_sizes, end1)
+    else:
+        middle = original_length // 2
+        start1 = middle - positions - window_sizes
+        end1 = middle - positions
+        start2 = middle + positions
+        end2 = middle + positions + window_sizes
+    return tuple(
+        np.clip(bound, 0, original_length) for bound in (start1, end1, start2, end2)
+    )
+
+
+def _scanning_iterations(
+    original_length: int,
+    direction: Direction,
+    step_value: Union[int, Sequence[int]],
+    step_mode: StepMode,
+    window_size: Union[int, Sequence[int]],
+    repetitions: Union[int, Sequence[int]],
+    iterations_start: Optional[int],
+    iterations_end: Optional[int],
+) -> Iterator[Tuple[Tuple[Tuple[int, int], ...], int]]:
+    # Window boundaries are computed as arrays, one chunk of iterations at a time, so that the
+    # process stays lazy however many iterations it has.
+    positions = _scanning_positions(
+        original_length,
+        direction,
+        step_value,
+        step_mode,
+        window_size,
+        repetitions,
+        iterations_start,
+        iterations_end,
+    )
+    while True:
+        chunk = list(itertools.islice(positions, _CHUNK_SIZE))
+        if not chunk:
+            return
+        chunk_positions, chunk_window_sizes, chunk_repetitions = (
+            np.array(column, dtype=np.int64) for column in zip(*chunk)
+        )
+        bounds = _window_bounds(
+            original_length, direction, chunk_positions, chunk_window_sizes
+        )
+        for start1, end1, start2, end2, repeats in zip(
+            *(bound.tolist() for bound in bounds), chunk_repetitions.tolist()
+        ):
+            yield ((start1, end1), (start2, end2)), repeats
+
+
+def _segment_ranges(
+    segments: Iterable[Tuple[int, int, int]], complement: bool, original_length: int
+) -> Iterator[Tuple[Tuple[Tuple[int, int], ...], int]]:
+    for start, end, repeats in segments:
+        if complement:
+            yield ((0, start), (end, original_length)), repeats
+        else:
+            yield ((start, end),), repeats
+
+
+def _process_arguments(
+    process: Callable[..., stream.Stream], keywords: Mapping[str, object]
+) -> Tuple[Callable[..., stream.Stream], Dict[str, object]]:
+    # Resolves a process, possibly a functools.partial, and additional keyword arguments into
+    # the process function and its complete arguments, defaults included.
+    if isinstance(process, functools.partial):
+        if process.args:
+            raise TypeError("processes can only be given keyword arguments")
+        keywords = {**process.keywords, **keywords}
+        process = process.func
+    if process not in (additive_process, subtractive_process, scanning_process):
+        raise TypeError(f"{process!r} is not a minimalism process")
+    arguments = inspect.signature(process).bind(None, **keywords)
+    arguments.apply_defaults()
+    if arguments.arguments["tracer"] is not None:
+        raise TypeError("processes applied through their index maps can't be traced")
+    return process, arguments.arguments
+
+
+def _process_iterations(
+    process: Callable[..., stream.Stream],
+    original_length: int,
+    keywords: Mapping[str, object] = {},
+) -> Iterator[Tuple[Sequence[Tuple[int, int]], int]]:
+    # Yields the (ranges, repeats) iterations of a process, as _segment_ranges does.
+    process, arguments = _process_arguments(process, keywords)
+
+    if process is scanning_process:
+        iterations = _scanning_iterations(
+            original_length,
+            arguments["direction"],
+            arguments["step_value"],
+            arguments["step_mode"],
+            arguments["window_size"],
+            arguments["repetitions"],
+            arguments["iterations_start"],
+            arguments["iterations_end"],
+        )
+    else:
+        subtractive = process is subtractive_process
+        segments = _process_segments(
+            original_length,
+            arguments["direction"],
+            arguments["step_value"],
+            arguments["step_mode"],
+            arguments["repetitions"],
+            arguments["iterations_start"],
+            arguments["iterations_end"],
+            subtractive,
+        )
+        iterations = _segment_ranges(
+            segments, _is_complement(arguments["direction"], subtractive), original_length
+        )
+    return iterations
+
+
+def _process_index_map(
+    process: Callable[..., stream.Stream],
+    original_length: int,
+    keywords: Mapping[str, object] = {},
+) -> np.ndarray:
+    # Returns, for each note of the output of the process, the index of the input note it
+    # copies.
+    return _iterations_index_map(_process_iterations(process, original_length, keywords))
+
+
+def _iterations_index_map(
+    iterations: Iterable[Tuple[Sequence[Tuple[int, int]], int]]
+) -> np.ndarray:
+    blocks = []
+    for ranges, repeats in iterations:
+        block = np.concatenate([np.arange(start, end, dtype=np.int64) for start, end in ranges])
+        if repeats > 0:
+            blocks.append(np.tile(block, repeats))
+    if not blocks:
+        return np.zeros(0, dtype=np.int64)
+    return np.concatenate(blocks)
+
+
+def _materialize_index_map(
+    index_map: np.ndarray, prototypes: Sequence[note.GeneralNote], shared: bool = False
 ) -> stream.Stream:
-    """Applies a scanning process to a stream.
+    clone = _shared_copy if shared else tools.clone
+    post_stream = stream.Stream()
+    offset = 0.0
+    for index in index_map.tolist():
+        note_ = prototypes[index]
+        post_stream.coreInsert(offset, clone(note_), ignoreSort=True)
+        offset = opFrac(offset + note_.duration.quarterLength)
+    post_stream.coreElementsChanged()
+    return post_stream
 
-    Builds a new stream by applying an scanning process to the original stream. Only note and
-    chord objects are included. Provided a stream of 6 elements, with a LINEAR sequence in FORWARD
-    direction, with a window_size of 2, this function will return a stream composed of:
-    12|23|34|45|56|6. With a PRIMES sequence, the result would be 12|34|6 (sequence = [0, 2, 3,
-    5, 7...]).
-    TODO: include inward/outward directions, repetitions and iterations options
-    TODO: include list[int] option for window_size
 
-    Args:
-        original_stream: The original stream to process.
-        direction: Optional; The direction of the scanning process. Default is Direction.FORWARD.
-        sequence: Optional; Determines the number sequence governing the starting position of the
-          window for each step of the scanning process.
-          Default is sequences.LINEAR ([1,2,3,4,5,6,7...]).
-        window_size: Options; Determines the size of the "window" that is scanning the original
-          stream.
-        repetitions: Optional; Determines the number of times each segment is repeated before
-          moving to the next step in the sequence. Default is 1.
-        steps: Optional; Stops the additive process after n steps in the sequence. By default,
-          it runs until the original stream is completed.
-        iterations_start: Optional; Starts the process at the specified iteration. By default,
-          scanning processes start at iteration 1.
-        iterations_end: Optional; Stops the process at the specified iteration. By default, the
-          process runs until the original stream is entierly traversed.
+# Notes of the original stream of a sweep, set once in each worker process.
+_sweep_prototypes: List[note.GeneralNote] = []
 
 
-    Returns:
-        The new stream created by the subtractive process.
-    """
+def _init_sweep_worker(prototypes: List[note.GeneralNote]) -> None:
+    global _sweep_prototypes
+    _sweep_prototypes = prototypes
+
+
+def _run_sweep_task(
+    task: Tuple[Callable[..., stream.Stream], Dict[str, object], bool]
+) -> Union[bytes, ProcessSize]:
+    process, parameters, summarize = task
+    if summarize:
+        return _process_size(process, _sweep_prototypes, parameters)
+    index_map = _process_index_map(process, len(_sweep_prototypes), parameters)
+    _, arguments = _process_arguments(process, parameters)
+    post_stream = _materialize_index_map(index_map, _sweep_prototypes, arguments["shared"])
+    # Streams store the offsets of their elements by object id, so they can't be pickled
+    # directly across processes; the freezer takes care of the ids.
+    return freezeThaw.StreamFreezer(post_stream, fastButUnsafe=True).writeStr(fmt="pickle")
+
+
+def _thaw_stream(data: bytes) -> stream.Stream:
+    thawer = freezeThaw.StreamThawer()
+    thawer.openStr(data)
+    return thawer.stream
+
+
+def _iter_ranges(
+    iterations: Iterable[Tuple[Sequence[Tuple[int, int]], int]],
+    original_notes: Sequence[note.GeneralNote],
+    shared: bool = False,
+) -> Iterator[Tuple[OffsetQL, note.GeneralNote]]:
+    # Copies are made from prototypes detached from any stream, which keeps shared copies from
+    # sharing payloads with the original notes.
+    prototypes = [_detached_copy(note_) for note_ in original_notes]
+    yield from _iter_prototype_ranges(
+        iterations, prototypes, _duration_prefix(prototypes), shared
+    )
+
+
+def _iter_prototype_ranges(
+    iterations: Iterable[Tuple[Sequence[Tuple[int, int]], int]],
+    prototypes: Sequence[note.GeneralNote],
+    prefix: Sequence[OffsetQL],
+    shared: bool = False,
+    offset: OffsetQL = 0.0,
+) -> Iterator[Tuple[OffsetQL, note.GeneralNote]]:
+    # Each iteration consists of ranges of prototypes played one after the other, repeated a
+    # number of times. Offsets are derived from the prefix sums of the original durations, so
+    # each segment is placed without summing the durations of previous ones.
+    clone = _shared_copy if shared else tools.clone
+    for ranges, repeats in iterations:
+        segment = []
+        local_offsets = []
+        segment_duration = 0.0
+        for start, end in ranges:
+            shift = segment_duration - prefix[start]
+            segment.extend(prototypes[start:end])
+            local_offsets.extend(opFrac(prefix[i] + shift) for i in range(start, end))
+            segment_duration = opFrac(segment_duration + prefix[end] - prefix[start])
+        for _ in range(repeats):
+            for note_, local_offset in zip(segment, local_offsets):
+                yield opFrac(offset + local_offset), clone(note_)
+            offset = opFrac(offset + segment_duration)
 
+
+def _duration_prefix(original_notes: Sequence[note.GeneralNote]) -> list[OffsetQL]:
+    # Offset of each original note, and total duration, when the notes are laid end to end.
+    prefix = [0.0]
+    for note_ in original_notes:
+        prefix.append(opFrac(prefix[-1] + note_.duration.quarterLength))
+    return prefix
+
+
+def _plan_size(
+    plan: _SegmentPlan, original_notes: Sequence[note.GeneralNote]
+) -> ProcessSize:
+    prefix = _duration_prefix(original_notes)
+    quarter_length = 0.0
+    for start, end, repeats in plan.segments():
+        segment_duration = prefix[end] - prefix[start]
+        if plan.complement:
+            segment_duration = prefix[-1] - segment_duration
+        quarter_length = opFrac(quarter_length + segment_duration * repeats)
+    return ProcessSize(
+        len(plan.starts),
+        int(np.dot(plan.segment_lengths(), plan.repetitions)),
+        quarter_length,
+    )
+
+
+def _process_size(
+    process: Callable[..., stream.Stream],
+    original_notes: Sequence[note.GeneralNote],
+    keywords: Mapping[str, object] = {},
+) -> ProcessSize:
+    # Sizes of a process, computed from its plan or the ranges of its iterations without
+    # building its index map.
+    resolved_process, arguments = _process_arguments(process, keywords)
+    if resolved_process is not scanning_process:
+        plan = _build_plan(
+            len(original_notes),
+            arguments["direction"],
+            arguments["step_value"],
+            arguments["step_mode"],
+            arguments["repetitions"],
+            arguments["iterations_start"],
+            arguments["iterations_end"],
+            subtractive=resolved_process is subtractive_process,
+        )
+        return _plan_size(plan, original_notes)
+
+    prefix = _duration_prefix(original_notes)
+    iteration_count = note_count = 0
+    quarter_length = 0.0
+    for ranges, repeats in _process_iterations(process, len(original_notes), keywords):
+        iteration_count += 1
+        note_count += repeats * sum(end - start for start, end in ranges)
+        segment_duration = sum(prefix[end] - prefix[start] for start, end in ranges)
+        quarter_length = opFrac(quarter_length + segment_duration * repeats)
+    return ProcessSize(iteration_count, note_count, quarter_length)
+
+
+def _materialize_plan(
+    plan: _SegmentPlan, original_notes: Sequence[note.GeneralNote], shared: bool = False
+) -> stream.Stream:
+    iterations = _segment_ranges(plan.segments(), plan.complement, plan.original_length)
+    return _events_to_stream(_iter_ranges(iterations, original_notes, shared))
+
+
+def _events_to_stream(
+    events: Iterable[Tuple[OffsetQL, note.GeneralNote]]
+) -> stream.Stream:
+    # Elements are inserted directly at their final offsets, in order, and the stream caches are
+    # only invalidated once all elements are in place.
+    post_stream = stream.Stream()
+    for offset, note_ in events:
+        post_stream.coreInsert(offset, note_, ignoreSort=True)
+    post_stream.coreElementsChanged()
+    return post_stream
+
+
+def _traced_stream(
+    iterations: Iterable[Tuple[Sequence[Tuple[int, int]], int]],
+    original_notes: Sequence[note.GeneralNote],
+    shared: bool,
+    tracer: Callable[[IterationTrace], None],
+) -> stream.Stream:
+    # Same result as _events_to_stream(_iter_ranges(...)), built one iteration at a time so that
+    # each phase can be timed separately. The time spent in the tracer itself is not reported.
+    prototypes = [_detached_copy(note_) for note_ in original_notes]
+    prefix = _duration_prefix(prototypes)
     post_stream = stream.Stream()
-    original_notes = original_stream.flat.notes
-    original_length = len(original_notes)
-    progression_index = 0
-    start_position = 0
-    end_position = 0
-    current_position = 0
-
-    while current_position < original_length:
-        current_stream = stream.Stream()
-        if direction is Direction.FORWARD:
-            start_position = current_position
-            end_position = current_position + window_size
-        elif direction is Direction.BACKWARD:
-            start_position = original_length - (current_position + window_size)
-            end_position = original_length - current_position
-        if start_position < 0:
-            start_position = 0
-        if end_position > original_length:
-            end_position = original_length
-        for i in range(start_position, end_position):
-            current_stream.append(copy.deepcopy(original_notes[i]))
-        post_stream.append(current_stream)
-        progression_index += 1
-        if isinstance(step_value, int):
-            current_position = progression_index * step_value
-
-        #current_position = sequence(progression_index)
+    offset = 0.0
+    iterations = iter(iterations)
+    for index in itertools.count():
+        plan_start = time.perf_counter()
+        try:
+            ranges, repeats = next(iterations)
+        except StopIteration:
+            break
+        copy_start = time.perf_counter()
+        events = list(
+            _iter_prototype_ranges([(ranges, repeats)], prototypes, prefix, shared, offset)
+        )
+        insert_start = time.perf_counter()
+        for event_offset, note_ in events:
+            post_stream.coreInsert(event_offset, note_, ignoreSort=True)
+        insert_end = time.perf_counter()
 
+        segment_duration = sum(prefix[end] - prefix[start] for start, end in ranges)
+        offset = opFrac(offset + segment_duration * repeats)
+        tracer(
+            IterationTrace(
+                index,
+                tuple(ranges),
+                repeats,
+                len(events),
+                offset,
+                copy_start - plan_start,
+                insert_start - copy_start,
+                insert_end - insert_start,
+            )
+        )
+    post_stream.coreElementsChanged()
     return post_stream
+
+
+def _detached_copy(original_note: note.GeneralNote) -> note.GeneralNote:
+    # Mapping the sites of the original note to new, empty sites keeps deepcopy from carrying
+    # them over and then purging them, which searches the elements of every site and made
+    # copying each note linear in the size of the original stream.
+    return copy.deepcopy(original_note, {id(original_note.sites): sites.Sites()})
+
+
+def _shared_copy(original_note: note.GeneralNote) -> note.GeneralNote:
+    # Builds a new note around the pitch and duration objects of the original note. Only the
+    # element itself, which carries the offset and sites, is new.
+    if type(original_note) is note.Note:
+        new_note = note.Note(original_note.pitch, duration=original_note.duration)
+    elif type(original_note) is chord.Chord:
+        new_note = chord.Chord(original_note.pitches, duration=original_note.duration)
+    elif type(original_note) is note.Rest:
+        new_note = note.Rest(duration=original_note.duration)
+    else:
+        return copy.deepcopy(original_note)
+    new_note.tie = original_note.tie
+    new_note.lyrics = list(original_note.lyrics)
+    new_note.articulations = list(original_note.articulations)
+    new_note.expressions = list(original_note.expressions)
+    if original_note.hasStyleInformation:
+        new_note.style = original_note.style
+    if original_note.hasEditorialInformation:
+        new_note.editorial = original_note.editorial
+    return new_note
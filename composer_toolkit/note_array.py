@@ -0,0 +1,231 @@
+"""
+Compact, array-backed representation of note sequences.
+
+A NoteArray stores a sequence of notes, chords and rests as a set of parallel NumPy arrays rather
+than as music21 objects, which makes it much lighter in memory and allows it to be processed with
+vectorized operations before anything is converted back to music21.
+
+"""
+
+from typing import List, Optional, Sequence
+
+import numpy as np
+from music21 import chord
+from music21 import note
+from music21 import pitch
+from music21 import stream
+from music21.common.numberTools import opFrac
+
+__all__ = ["NoteArray"]
+
+# Step codes used by NoteArray.step, in the order of music21 step names.
+STEPS = "CDEFGAB"
+
+_STEP_CODES = {step: code for code, step in enumerate(STEPS)}
+_STEP_PITCH_CLASSES = np.array([0, 2, 4, 5, 7, 9, 11], dtype=np.int64)
+
+
+class NoteArray:
+    """
+    A sequence of notes, chords and rests stored as parallel NumPy arrays.
+
+    Each row of the arrays holds one pitch: a note takes one row, a chord one row per pitch and a
+    rest a single row with no pitch. Rows belonging to the same note, chord or rest share the
+    same event number, and events are stored in order. Only pitch, spelling, offset, duration and
+    the text of the first lyric are kept.
+
+    Attributes:
+        ps: Pitch space value of each row (60.0 = C4), NaN for rests.
+        step: Code of the step of each row, as an index into STEPS (0 = C), -1 for rests.
+        alter: Alteration of the accidental of each row in semitones, NaN for rows without an
+          accidental.
+        offset: Offset of the event of each row, in quarter notes.
+        quarter_length: Duration of the event of each row, in quarter notes.
+        rest: Whether each row is a rest.
+        chord: Whether each row belongs to a chord.
+        event: Event number of each row.
+        lyric: Index of the lyric of the event of each row in lyrics, -1 for rows without a lyric.
+        lyrics: Texts of the lyrics, each stored once.
+    """
+
+    def __init__(
+        self,
+        ps: Sequence[float],
+        step: Sequence[int],
+        alter: Sequence[float],
+        offset: Sequence[float],
+        quarter_length: Sequence[float],
+        rest: Sequence[bool],
+        chord: Sequence[bool],
+        event: Sequence[int],
+        lyric: Optional[Sequence[int]] = None,
+        lyrics: Sequence[str] = (),
+    ):
+        """Creates a NoteArray from its arrays.
+
+        Args:
+            ps, step, alter, offset, quarter_length, rest, chord, event, lyric: The arrays of
+              the note array, as described for the class. lyric is optional; by default no row
+              has a lyric.
+            lyrics: Optional; The texts of the lyrics referred to by lyric.
+
+        Raises:
+            ValueError: If the arrays don't all have the same length, or the events are not in
+              order.
+        """
+        self.ps = np.asarray(ps, dtype=np.float64)
+        self.step = np.asarray(step, dtype=np.int8)
+        self.alter = np.asarray(alter, dtype=np.float32)
+        self.offset = np.asarray(offset, dtype=np.float64)
+        self.quarter_length = np.asarray(quarter_length, dtype=np.float64)
+        self.rest = np.asarray(rest, dtype=bool)
+        self.chord = np.asarray(chord, dtype=bool)
+        self.event = np.asarray(event, dtype=np.int32)
+        if lyric is None:
+            lyric = np.full(len(self.ps), -1)
+        self.lyric = np.asarray(lyric, dtype=np.int32)
+        self.lyrics = list(lyrics)
+
+        arrays = (
+            self.step,
+            self.alter,
+            self.offset,
+            self.quarter_length,
+            self.rest,
+            self.chord,
+            self.event,
+            self.lyric,
+        )
+        if any(len(array) != len(self.ps) for array in arrays):
+            raise ValueError("all the arrays of a NoteArray must have the same length")
+        if np.any(np.diff(self.event) < 0):
+            raise ValueError("the events of a NoteArray must be in order")
+
+    def __len__(self) -> int:
+        return len(self.ps)
+
+    def __repr__(self) -> str:
+        return f"<NoteArray {self.event_count} events, {len(self)} rows>"
+
+    @property
+    def event_count(self) -> int:
+        """The number of notes, chords and rests in the array."""
+        return len(np.unique(self.event))
+
+    @property
+    def nbytes(self) -> int:
+        """The number of bytes taken by the arrays."""
+        return sum(
+            array.nbytes
+            for array in (
+                self.ps,
+                self.step,
+                self.alter,
+                self.offset,
+                self.quarter_length,
+                self.rest,
+                self.chord,
+                self.event,
+                self.lyric,
+            )
+        )
+
+    @classmethod
+    def from_stream(cls, original_stream: stream.Stream) -> "NoteArray":
+        """Creates a NoteArray from the notes, chords and rests of a stream.
+
+        Args:
+            original_stream: The stream to convert. It is flattened, so offsets are relative to
+              the start of the stream.
+
+        Returns:
+            A new NoteArray.
+
+        Raises:
+            ValueError: If the stream contains an element that is neither a rest nor has pitches,
+              such as an unpitched note or an empty chord.
+        """
+        flat_stream = original_stream.flatten()
+        ps, step, alter, offset, quarter_length = [], [], [], [], []
+        rest, chord_, event, lyric = [], [], [], []
+        lyrics: List[str] = []
+        lyric_ids = {}
+
+        for index, element in enumerate(flat_stream.notesAndRests):
+            element_offset = float(flat_stream.elementOffset(element))
+            element_length = float(element.duration.quarterLength)
+            text = element.lyric
+            if text is None:
+                lyric_id = -1
+            else:
+                lyric_id = lyric_ids.setdefault(text, len(lyrics))
+                if lyric_id == len(lyrics):
+                    lyrics.append(text)
+
+            if isinstance(element, note.Rest):
+                pitches = [None]
+            else:
+                pitches = element.pitches
+                if not pitches:
+                    raise ValueError(f"{element!r} has no pitches and can't be stored in a NoteArray")
+            for pitch_ in pitches:
+                if pitch_ is None:
+                    ps.append(np.nan)
+                    step.append(-1)
+                    alter.append(np.nan)
+                else:
+                    ps.append(pitch_.ps)
+                    step.append(_STEP_CODES[pitch_.step])
+                    alter.append(np.nan if pitch_.accidental is None else pitch_.accidental.alter)
+                offset.append(element_offset)
+                quarter_length.append(element_length)
+                rest.append(pitch_ is None)
+                chord_.append(isinstance(element, chord.Chord))
+                event.append(index)
+                lyric.append(lyric_id)
+
+        return cls(ps, step, alter, offset, quarter_length, rest, chord_, event, lyric, lyrics)
+
+    def to_stream(self) -> stream.Stream:
+        """Converts the array to a stream of music21 notes, chords and rests.
+
+        Returns:
+            A new stream, with an element for each event of the array.
+        """
+        octaves = self.octaves()
+        post_stream = stream.Stream()
+        starts = np.flatnonzero(np.diff(self.event, prepend=-1))
+        ends = np.append(starts[1:], len(self))
+        for start, end in zip(starts.tolist(), ends.tolist()):
+            quarter_length = opFrac(float(self.quarter_length[start]))
+            if self.rest[start]:
+                element = note.Rest(quarterLength=quarter_length)
+            else:
+                pitches = [self._pitch(row, int(octaves[row])) for row in range(start, end)]
+                if self.chord[start]:
+                    element = chord.Chord(pitches, quarterLength=quarter_length)
+                else:
+                    element = note.Note(pitches[0], quarterLength=quarter_length)
+            if self.lyric[start] >= 0:
+                element.lyric = self.lyrics[self.lyric[start]]
+            post_stream.coreInsert(
+                opFrac(float(self.offset[start])), element, ignoreSort=True
+            )
+        post_stream.coreElementsChanged()
+        return post_stream
+
+    def octaves(self) -> np.ndarray:
+        """Returns the octave of each row, as spelled by its step and alteration.
+
+        Octaves are recovered from the pitch space value of the unaltered step. Rows of rests get
+        an arbitrary octave.
+        """
+        alter = np.nan_to_num(self.alter.astype(np.float64))
+        natural_ps = np.rint(np.nan_to_num(self.ps) - alter)
+        return (natural_ps - _STEP_PITCH_CLASSES[np.maximum(self.step, 0)]) // 12 - 1
+
+    def _pitch(self, row: int, octave: int) -> pitch.Pitch:
+        pitch_ = pitch.Pitch(STEPS[self.step[row]], octave=octave)
+        if not np.isnan(self.alter[row]):
+            pitch_.accidental = float(self.alter[row])
+        return pitch_
@@ -19,11 +19,28 @@ This file incorporates and extends code covered by the following license:
     
 """
 
-__all__ = ["AbstractPentatonicScale", "PentatonicScale"]
+__all__ = [
+    "AbstractPentatonicScale",
+    "PentatonicScale",
+    "ScaleTable",
+    "scale_table",
+    "isolated_copy",
+]
+
+import bisect
+import collections
+import copy
+import threading
+import weakref
+from typing import Optional, Sequence, Tuple, Union
 
 import music21
+import numpy as np
+from music21 import pitch
 from music21.scale import intervalNetwork
 
+from composer_toolkit.note_array import STEPS
+
 
 class AbstractPentatonicScale(music21.scale.AbstractScale):
     def __init__(self, mode=None):
@@ -70,3 +87,388 @@ class PentatonicScale(music21.scale.ConcreteScale):
         super().__init__(tonic=tonic)
         self._abstract = AbstractPentatonicScale(mode=mode)
         self.type = "Pentatonic"
+
+
+# Pitch classes of the natural steps, used to recover octaves from pitch space values.
+_STEP_PITCH_CLASSES = {"C": 0, "D": 2, "E": 4, "F": 5, "G": 7, "A": 9, "B": 11}
+
+# Tables built by scale_table, cached for as long as their scale is alive. Tables are never
+# changed once built; the lock only guards building them and adding them to the cache.
+_scale_tables: "weakref.WeakKeyDictionary[music21.scale.ConcreteScale, Optional[ScaleTable]]"
+_scale_tables = weakref.WeakKeyDictionary()
+_scale_tables_lock = threading.Lock()
+
+
+class ScaleTable:
+    """
+    Pitch space lookup table of an octave-repeating scale.
+
+    The degrees of the scale are numbered by a single index running through every octave: index 0
+    is the tonic in octave -1 of pitch space (the tonic's pitch space value modulo 12), index 1 the
+    next degree above it, and so on. Converting between a pitch space value and its index, or
+    stepping through the scale, is then simple arithmetic on the index.
+
+    Some scales spell a degree differently when it is reached going down, such as the chromatic
+    scale, which has A- on the way up and G# on the way down. Each degree therefore has an
+    ascending and a descending spelling.
+
+    Every lookup also has a vectorized version working on NumPy arrays, which spells pitches with
+    the step codes and alterations used by NoteArray.
+
+    Attributes:
+        tonic_ps: Pitch space value of the tonic at index 0.
+        offsets: Distance in semitones from the tonic to each degree of an octave, ascending.
+        ascending_spellings: Step name and alteration in semitones of each degree of an octave when
+          reached going up. The alteration is None for degrees without an accidental.
+        descending_spellings: The same, when reached going down.
+    """
+
+    __slots__ = (
+        "tonic_ps",
+        "offsets",
+        "ascending_spellings",
+        "descending_spellings",
+        "_offset_array",
+        "_step_codes",
+        "_alters",
+    )
+
+    def __init__(
+        self,
+        tonic_ps: float,
+        offsets: Sequence[float],
+        ascending_spellings: Sequence[Tuple[str, Optional[float]]],
+        descending_spellings: Sequence[Tuple[str, Optional[float]]],
+    ):
+        self.tonic_ps = tonic_ps % 12
+        self.offsets: Tuple[float, ...] = tuple(offsets)
+        self.ascending_spellings: Tuple[Tuple[str, Optional[float]], ...] = tuple(
+            ascending_spellings
+        )
+        self.descending_spellings: Tuple[Tuple[str, Optional[float]], ...] = tuple(
+            descending_spellings
+        )
+
+        # Rows are the ascending and descending spellings
+        spellings = (self.ascending_spellings, self.descending_spellings)
+        self._offset_array = np.array(self.offsets, dtype=np.float64)
+        self._step_codes = np.array(
+            [[STEPS.index(step) for step, _ in row] for row in spellings], dtype=np.int8
+        )
+        self._alters = np.array(
+            [[np.nan if alter is None else alter for _, alter in row] for row in spellings],
+            dtype=np.float32,
+        )
+
+    def __len__(self) -> int:
+        return len(self.offsets)
+
+    def __repr__(self) -> str:
+        return f"<ScaleTable {len(self)} degrees from {self.tonic_ps}>"
+
+    def index(self, ps: float) -> Tuple[int, bool]:
+        """Finds the index of a pitch space value.
+
+        Args:
+            ps: The pitch space value to look up.
+
+        Returns:
+            A tuple of the index of the highest degree at or below ps, and whether ps is that
+            degree exactly.
+        """
+        octave, within = divmod(ps - self.tonic_ps, 12)
+        degree = bisect.bisect_right(self.offsets, within) - 1
+        return int(octave) * len(self) + degree, within == self.offsets[degree]
+
+    def ps(self, index: int) -> float:
+        """Returns the pitch space value of the degree at an index."""
+        octave, degree = divmod(index, len(self))
+        return self.tonic_ps + 12 * octave + self.offsets[degree]
+
+    def spelling(self, index: int, descending: bool = False) -> Tuple[str, int, Optional[float]]:
+        """Returns the spelling of the degree at an index.
+
+        Args:
+            index: The index of the degree.
+            descending: Optional; If true, the descending spelling is used. By default, the
+              ascending spelling is used.
+
+        Returns:
+            A tuple of the step, octave and alteration (None for no accidental) of the degree.
+        """
+        spellings = self.descending_spellings if descending else self.ascending_spellings
+        step, alter = spellings[index % len(self)]
+        natural_ps = self.ps(index) - (alter or 0)
+        octave = round((natural_ps - _STEP_PITCH_CLASSES[step]) / 12) - 1
+        return step, octave, alter
+
+    def index_array(self, ps: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """Finds the indices of an array of pitch space values.
+
+        Args:
+            ps: The pitch space values to look up. NaN values, used for rests, are allowed.
+
+        Returns:
+            A tuple of an array of the indices of the highest degrees at or below the values, and
+            an array of whether each value is that degree exactly. NaN values are never in the
+            scale and get an arbitrary index.
+        """
+        ps = np.asarray(ps, dtype=np.float64)
+        valid = ~np.isnan(ps)
+        octave, within = np.divmod(np.where(valid, ps, self.tonic_ps) - self.tonic_ps, 12)
+        degree = np.searchsorted(self._offset_array, within, side="right") - 1
+        index = octave.astype(np.int64) * len(self) + degree
+        return index, valid & (within == self._offset_array[degree])
+
+    def ps_array(self, index: np.ndarray) -> np.ndarray:
+        """Returns the pitch space values of the degrees at an array of indices."""
+        octave, degree = np.divmod(index, len(self))
+        return self.tonic_ps + 12 * octave + self._offset_array[degree]
+
+    def spelling_array(
+        self, index: np.ndarray, descending: Union[bool, np.ndarray] = False
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """Returns the spellings of the degrees at an array of indices.
+
+        Args:
+            index: The indices of the degrees.
+            descending: Optional; Whether to use the descending spelling, for all the degrees or
+              for each of them. By default, the ascending spelling is used.
+
+        Returns:
+            A tuple of an array of step codes, as indices into note_array.STEPS, and an array of
+            alterations, NaN for degrees without an accidental. Octaves follow from the pitch space
+            values and are not returned.
+        """
+        degree = np.asarray(index) % len(self)
+        row = np.asarray(descending, dtype=np.intp)
+        return self._step_codes[row, degree], self._alters[row, degree]
+
+    def distance(self, ps_from: float, ps_to: float) -> Optional[int]:
+        """Returns the number of scale steps between two pitch space values.
+
+        The distance is counted as ConcreteScale.nextPitch counts steps: if ps_from is not in the
+        scale it is first moved to its neighbour on the far side of the direction of motion.
+
+        Args:
+            ps_from: The pitch space value to count from.
+            ps_to: The pitch space value to count to.
+
+        Returns:
+            The number of steps, negative if ps_to is below ps_from, or None if ps_to is not in the
+            scale and so can't be reached by steps.
+        """
+        index_to, in_scale = self.index(ps_to)
+        if not in_scale:
+            return None
+        index_from, in_scale = self.index(ps_from)
+        distance = index_to - index_from
+        if not in_scale and distance <= 0:
+            distance -= 1
+        return distance
+
+    def step_index(self, ps: float, steps: int) -> int:
+        """Returns the index reached by moving a pitch space value by scale steps.
+
+        A pitch that is not in the scale first moves to its neighbour on the far side of the
+        direction of motion, as music21's ConcreteScale.nextPitch does, so that one step up from a
+        pitch between two degrees lands on the degree above it.
+
+        Args:
+            ps: The pitch space value to move.
+            steps: The number of steps. Positive values move up, negative values move down.
+
+        Returns:
+            The index of the degree reached.
+        """
+        index, in_scale = self.index(ps)
+        if not in_scale and steps < 0:
+            index += 1
+        return index + steps
+
+    def transpose_pitch(self, pitch_: pitch.Pitch, steps: int) -> None:
+        """Transposes a pitch in place by a number of scale steps.
+
+        Args:
+            pitch_: The pitch to transpose.
+            steps: The number of steps. Positive values transpose up, negative values transpose
+              down.
+        """
+        if steps != 0:
+            self.spell_pitch(pitch_, self.step_index(pitch_.ps, steps), steps < 0)
+
+    def spell_pitch(self, pitch_: pitch.Pitch, index: int, descending: bool = False) -> None:
+        """Sets a pitch in place to the degree at an index.
+
+        Args:
+            pitch_: The pitch to change.
+            index: The index of the degree.
+            descending: Optional; If true, the descending spelling is used. By default, the
+              ascending spelling is used.
+        """
+        step, octave, alter = self.spelling(index, descending)
+        pitch_.step = step
+        pitch_.octave = octave
+        pitch_.accidental = None if alter is None else pitch.Accidental(alter)
+
+
+def scale_table(reference_scale: music21.scale.ConcreteScale) -> Optional[ScaleTable]:
+    """Returns the lookup table of a scale, building it the first time it is asked for.
+
+    Tables are cached per scale instance, so scales are expected not to be changed once used.
+    Tables are immutable and this function may be called from several threads.
+
+    Args:
+        reference_scale: The scale to tabulate.
+
+    Returns:
+        The table of the scale, or None if the scale can't be tabulated because it doesn't repeat
+        at the octave or has different degrees ascending and descending. Such scales have to be
+        walked with nextPitch.
+    """
+    try:
+        return _scale_tables[reference_scale]
+    except KeyError:
+        pass
+    with _scale_tables_lock:
+        if reference_scale not in _scale_tables:
+            _scale_tables[reference_scale] = _build_scale_table(reference_scale)
+        return _scale_tables[reference_scale]
+
+
+def isolated_copy(reference_scale: music21.scale.ConcreteScale) -> music21.scale.ConcreteScale:
+    """Copies a scale without the pitches cached by its interval network.
+
+    ConcreteScale.nextPitch can change the pitches cached by a scale's interval network, which
+    may be shared with other threads and can leave pitches of the wrong octave in the cache. The
+    copy can be walked with nextPitch without affecting or being affected by the original.
+
+    Args:
+        reference_scale: The scale to copy.
+
+    Returns:
+        A new scale, with empty caches.
+    """
+    memo = {}
+    network = None if reference_scale.abstract is None else reference_scale.abstract._net
+    if network is not None:
+        memo[id(network._ascendingCache)] = collections.OrderedDict()
+        memo[id(network._descendingCache)] = collections.OrderedDict()
+    return copy.deepcopy(reference_scale, memo)
+
+
+def _build_scale_table(reference_scale: music21.scale.ConcreteScale) -> Optional[ScaleTable]:
+    abstract = reference_scale.abstract
+    if abstract is None:
+        return None
+    network = abstract._net
+    if network is None or not network.deterministic:
+        return None
+
+    tonic = pitch.Pitch("C4") if reference_scale.tonic is None else reference_scale.tonic
+    tonic = pitch.Pitch(tonic.name, octave=tonic.implicitOctave)
+    octave_up = tonic.transpose(12)
+    octave_down = tonic.transpose(-12)
+
+    # Ascending degrees are realized up from the tonic, descending degrees down to it, as
+    # nextPitch realizes them.
+    ascending = _isolated_network(network).realizePitch(
+        tonic,
+        abstract.tonicDegree,
+        minPitch=tonic,
+        maxPitch=octave_up,
+        alteredDegrees=abstract._alteredDegrees,
+        direction=music21.scale.Direction.ASCENDING,
+    )[:-1]
+    descending = _isolated_network(network).realizePitch(
+        tonic,
+        abstract.tonicDegree,
+        minPitch=octave_down,
+        maxPitch=tonic,
+        alteredDegrees=abstract._alteredDegrees,
+        direction=music21.scale.Direction.DESCENDING,
+    )[:-1]
+
+    offsets = [p.ps - tonic.ps for p in ascending]
+    if offsets != sorted(set(offsets)) or offsets[0] != 0 or offsets[-1] >= 12:
+        return None
+    if [p.ps - octave_down.ps for p in descending] != offsets:
+        return None
+    table = ScaleTable(
+        tonic.ps,
+        offsets,
+        [_spelling(p) for p in ascending],
+        [_spelling(p) for p in descending],
+    )
+    if not _spells_like_next_pitch(table, network, abstract, tonic):
+        return None
+    return table
+
+
+def _spells_like_next_pitch(
+    table: ScaleTable,
+    network: music21.scale.intervalNetwork.IntervalNetwork,
+    abstract: music21.scale.AbstractScale,
+    tonic: pitch.Pitch,
+) -> bool:
+    # nextPitch spells each step by applying the intervals of the network to the spelling of the
+    # degree it starts from. For some networks (whole-tone, octatonic) this spells a degree
+    # differently depending on where the walk started, which a table of one spelling per degree
+    # and direction can't represent. The walks nextPitch takes from each degree are replayed here
+    # and compared with the table. Once a walk is back an octave later on the spelling it had
+    # after starting on the spelling of the table, it repeats itself, so one or two octaves are
+    # enough.
+    network = _isolated_network(network)
+    for direction in (music21.scale.Direction.ASCENDING, music21.scale.Direction.DESCENDING):
+        descending = direction == music21.scale.Direction.DESCENDING
+        for node_id, node in network.nodes.items():
+            if node_id == music21.scale.intervalNetwork.Terminus.HIGH:
+                continue
+            pitch_ = network.getPitchFromNodeDegree(
+                pitchReference=tonic,
+                nodeName=abstract.tonicDegree,
+                nodeDegreeTarget=node.degree,
+                direction=direction,
+                minPitch=None,
+                maxPitch=None,
+                alteredDegrees=None,
+            )
+            result = network.processAlteredNodes(
+                alteredDegrees=abstract._alteredDegrees, n=node, p=pitch_, direction=direction
+            )
+            index, in_scale = table.index(result.ps)
+            if not in_scale:
+                return False
+            octaves = 1
+            if (result.step, result.octave, _spelling(result)[1]) != table.spelling(
+                index, descending
+            ):
+                octaves = 2
+            for steps in range(1, octaves * len(table) + 1):
+                edges, nodes = network.getNext(node, direction)
+                node = nodes[0]
+                interval_ = edges[0].interval.reverse() if descending else edges[0].interval
+                pitch_ = network.transposePitchAndApplySimplification(interval_, pitch_)
+                result = network.processAlteredNodes(
+                    alteredDegrees=abstract._alteredDegrees, n=node, p=pitch_, direction=direction
+                )
+                expected = table.spelling(index - steps if descending else index + steps, descending)
+                if (result.step, result.octave, _spelling(result)[1]) != expected:
+                    return False
+    return True
+
+
+def _isolated_network(
+    network: music21.scale.intervalNetwork.IntervalNetwork,
+) -> music21.scale.intervalNetwork.IntervalNetwork:
+    # ConcreteScale.nextPitch can change the pitches cached by a network, and realizations with
+    # altered degrees are cached alongside unaltered ones, so each use gets a copy of the network
+    # with caches of its own.
+    network = copy.copy(network)
+    network._ascendingCache = collections.OrderedDict()
+    network._descendingCache = collections.OrderedDict()
+    return network
+
+
+def _spelling(pitch_: pitch.Pitch) -> Tuple[str, Optional[float]]:
+    return pitch_.step, None if pitch_.accidental is None else pitch_.accidental.alter
@@ -5,9 +5,94 @@ A set of functions that are useful when performing the analysis of atonal works
 
 """
 
-import itertools
+import collections
+import functools
 from music21 import chord
-from typing import List, Union, Sequence
+from music21 import pitch
+from music21.chord import tables
+from typing import Dict, List, NamedTuple, Tuple, Union, Sequence
+
+# Bitmask of the aggregate, the set of all twelve pitch classes.
+_AGGREGATE = 0xFFF
+
+class SetClass(NamedTuple):
+    """Set-class data of a pitch class set, as held by the set class table.
+
+    Attributes:
+        normal_order: The normal order of the set, as given by music21.
+        prime_form: The prime form of the set.
+        forte_class: The Forte class of the set, where inversions are distinguished by A or B.
+        forte_class_tni: The Forte TnI class of the set, where inversions are not distinguished.
+        interval_vector: The interval vector of the set.
+    """
+    normal_order: Tuple[int, ...]
+    prime_form: Tuple[int, ...]
+    forte_class: str
+    forte_class_tni: str
+    interval_vector: Tuple[int, ...]
+
+@functools.lru_cache(maxsize=None)
+def set_class_table() -> Tuple[SetClass, ...]:
+    """Returns the set-class data of all 4096 pitch class sets, indexed by their bitmask.
+
+    The table is built from the music21 chord tables the first time it is asked for. See
+    pitch_class_mask for how sets map to bitmasks.
+
+    Returns:
+        A tuple of 4096 SetClass, the first being the empty set.
+    """
+    table = [None] * (_AGGREGATE + 1)
+    table[0] = SetClass((), (), "N/A", "N/A", (0, 0, 0, 0, 0, 0))
+    for cardinality in range(1, 13):
+        for index in range(1, len(tables.FORTE[cardinality])):
+            for inversion in tables.forteIndexToInversionsAvailable(cardinality, index):
+                address = (cardinality, index, inversion)
+                transposed_normal_order = tables.addressToTransposedNormalForm(address)
+                prime_form = tuple(tables.addressToPrimeForm(address))
+                forte_class = tables.addressToForteName(address, "tn")
+                forte_class_tni = tables.addressToForteName(address, "tni")
+                interval_vector = tuple(tables.addressToIntervalVector(address))
+
+                # Like music21, the normal order of a set is its transposed normal order
+                # transposed by the lowest possible interval
+                for interval in range(12):
+                    normal_order = tuple((pc + interval) % 12 for pc in transposed_normal_order)
+                    mask = _mask(normal_order)
+                    if table[mask] is None:
+                        table[mask] = SetClass(
+                            normal_order, prime_form, forte_class, forte_class_tni, interval_vector
+                        )
+    return tuple(table)
+
+def pitch_class_mask(
+    pcset: Union[chord.Chord, Sequence[Union[int, str]]]
+) -> int:
+    """Returns the bitmask of a pitch class set, where bit n is set if pitch class n is in the set.
+
+    Args:
+        pcset: The pitch class set. Can be a Chord object or a sequence of pitch classes.
+
+    Returns:
+        The bitmask of the pitch class set, between 0 and 4095.
+    """
+    if isinstance(pcset, chord.Chord):
+        return _mask(p.pitchClass for p in pcset.pitches)
+    if isinstance(pcset, str) or not all(isinstance(pc, (int, str)) for pc in pcset):
+        return _mask(p.pitchClass for p in chord.Chord(pcset).pitches)
+    return _mask(_pitch_class(pc) for pc in pcset)
+
+def set_class(
+    pcset: Union[chord.Chord, Sequence[Union[int, str]]]
+) -> SetClass:
+    """Returns the set-class data of a pitch class set, looked up in the set class table.
+
+    Args:
+        pcset: The pitch class set to analyze. Can be a Chord object or a sequence of pitch classes.
+
+    Returns:
+        The set-class data of the pitch class set.
+    """
+    return set_class_table()[pitch_class_mask(pcset)]
 
 def forte_class(
     pcset: Union[chord.Chord, Sequence[Union[int, str]]]
@@ -20,10 +105,7 @@ def forte_class(
     Returns:
         The Forte class of the pitch class set.
     """
-    if not isinstance(pcset, chord.Chord):
-        pcset = chord.Chord(pcset)
-
-    return pcset.forteClass
+    return set_class(pcset).forte_class
 
 def prime_form(
     pcset: Union[chord.Chord, Sequence[Union[int, str]]]
@@ -36,10 +118,7 @@ def prime_form(
     Returns:
         The prime form of the pitch class set.
     """
-    if not isinstance(pcset, chord.Chord):
-        pcset = chord.Chord(pcset)
-
-    return pcset.primeForm
+    return list(set_class(pcset).prime_form)
     
 
 def normal_order(
@@ -54,14 +133,12 @@ def normal_order(
     Returns:
         The normal order of the pitch class set.
     """
-    if not isinstance(pcset, chord.Chord):
-        pcset = chord.Chord(pcset)
-        
+    normal_order = set_class(pcset).normal_order
+
     if transposed:
-        transposition_interval = pcset.normalOrder[0]
-        return [(pc - transposition_interval) % 12 for pc in pcset.normalOrder]
+        return _transposed_to_zero(normal_order)
 
-    return pcset.normalOrder
+    return list(normal_order)
 
 # chromatically invert all intervals of a pitch class set around the root of the normal order
 def inverted(
@@ -77,22 +154,16 @@ def inverted(
     Returns:
         The inverted pitch class set.
     """
-    if not isinstance(pcset, chord.Chord):
-        pcset = chord.Chord(pcset)
-    
     # invert around the root of the normal order
-    normal_order = pcset.normalOrder
-    
+    normal_order = set_class(pcset).normal_order
+
     root = normal_order[0]
-    inverted = [(root - pc) % 12 for pc in normal_order]
-    
-    inverted = chord.Chord(inverted)
-            
+    inverted = set_class_table()[_mask((root - pc) % 12 for pc in normal_order)].normal_order
+
     if transposed:
-        transposition_interval = inverted.normalOrder[0]
-        return [(pc - transposition_interval) % 12 for pc in inverted.normalOrder]
+        return _transposed_to_zero(inverted)
 
-    return inverted.normalOrder
+    return list(inverted)
 
 def complement(
     pcset: Union[chord.Chord, Sequence[Union[int, str]]],
@@ -107,56 +178,37 @@ def complement(
     Returns:
         The complement of the pitch class set.
     """
-    
-    if not isinstance(pcset, chord.Chord):
-        pcset = chord.Chord(pcset)
-    
-    normal_order = pcset.normalOrder
-    
-    complement = []
-    for pc in set(range(12)):
-        if pc not in normal_order:
-            complement.append(pc)
-    
-    complement = chord.Chord(complement)
-    
+    complement = set_class_table()[pitch_class_mask(pcset) ^ _AGGREGATE].normal_order
+
     if transposed:
-        transposition_interval = complement.normalOrder[0]
-        return [(pc - transposition_interval) % 12 for pc in complement.normalOrder]
-    
-    return complement.normalOrder
+        return _transposed_to_zero(complement)
+
+    return list(complement)
 
 def subsets(
-    pcset: Union[chord.Chord, Sequence[Union[int, str]]]
-) -> List[str]:
+    pcset: Union[chord.Chord, Sequence[Union[int, str]]],
+    counts: bool = False,
+) -> Union[List[str], Dict[str, int]]:
     """Returns all subsets of a pitch class set.
 
+    Subsets are enumerated as submasks of the bitmask of the set, and each subset is reduced to its
+    set class through the set class table. Only proper subsets of at least three pitch classes
+    are considered.
+
     Args:
-        pcset: The pitch class set to analyze. Can be a Chord object or a sequence of pitch.
-        transposed: If True, the pitch class set is transposed to T=0 (C).
-        
+        pcset: The pitch class set to analyze. Can be a Chord object or a sequence of pitch classes.
+        counts: If True, the number of subsets belonging to each set class is returned as well, as
+          used to study the K and Kh relations.
+
     Returns:
-        A list of all subsets of the pitch class set, given in forte numbers.
+        A list of the set classes of the subsets, given in Forte TnI names, from the largest
+        cardinality down and by Forte number. If counts is True, a dict mapping each of these
+        names to the number of subsets in that set class, in the same order.
     """
-    
-    if not isinstance(pcset, chord.Chord):
-        pcset = chord.Chord(pcset)
-    
-    subsets = []
-    
-    found = set()
-    for cardinal in range(len(pcset.pitches)-1, 2, -1):
-        for combination in itertools.combinations(pcset.pitches, cardinal):
-            subset = chord.Chord(chord.Chord(combination))
-            
-            if subset.primeFormString in found:
-                continue    
-            
-            found.add(subset.primeFormString)
-            
-            subsets.append(subset.forteClassTnI)
-            
-    return subsets
+    subset_counts = _subset_counts(_mask(set_class(pcset).prime_form))
+    if counts:
+        return dict(subset_counts)
+    return [forte_class_tni for forte_class_tni, _ in subset_counts]
 
 def t_operator(
     pcset1: Union[chord.Chord, Sequence[Union[int, str]]],
@@ -171,12 +223,41 @@ def t_operator(
     Returns:
         int: the interval of transposition between the two pitch class sets.
     """
+    return set_class(pcset2).normal_order[0] - set_class(pcset1).normal_order[0]
+
     
-    if not isinstance(pcset1, chord.Chord):
-        pcset1 = chord.Chord(pcset1)
-        
-    if not isinstance(pcset2, chord.Chord):
-        pcset2 = chord.Chord(pcset2)
-        
-    return pcset2.normalOrder[0] - pcset1.normalOrder[0]
-    
\ No newline at end of file
+
+def _mask(pitch_classes) -> int:
+    mask = 0
+    for pc in pitch_classes:
+        mask |= 1 << pc
+    return mask
+
+@functools.lru_cache(maxsize=None)
+def _pitch_class(pc: Union[int, str]) -> int:
+    # Integers are pitch space values, as for Chord objects
+    if isinstance(pc, int):
+        return pc % 12
+    return pitch.Pitch(pc).pitchClass
+
+@functools.lru_cache(maxsize=None)
+def _subset_counts(mask: int) -> Tuple[Tuple[str, int], ...]:
+    # Sets of the same set class have subsets of the same classes, so this is only called for prime
+    # forms
+    table = set_class_table()
+    subset_counts = collections.Counter()
+    submask = (mask - 1) & mask
+    while submask:
+        if submask.bit_count() >= 3:
+            subset_counts[table[submask].forte_class_tni] += 1
+        submask = (submask - 1) & mask
+    return tuple(sorted(subset_counts.items(), key=lambda item: _forte_order(item[0])))
+
+def _forte_order(forte_class_tni: str) -> Tuple[int, int]:
+    # Largest cardinalities first, then by Forte number
+    cardinality, number = forte_class_tni.split("-")
+    return -int(cardinality), int(number)
+
+def _transposed_to_zero(normal_order: Sequence[int]) -> List[int]:
+    transposition_interval = normal_order[0]
+    return [(pc - transposition_interval) % 12 for pc in normal_order]
@@ -19,37 +19,73 @@ This file incorporates and extends code covered by the following license:
     
 """
 
+import copy
+import functools
 import numbers
-from typing import Union, Sequence, Optional, Type
-from copy import deepcopy
+from typing import Union, Sequence, Optional, Tuple, Type, TypeVar
+
+import numpy as np
 from music21 import duration
 from music21 import note
 from music21 import stream
 from music21 import pitch
 from music21 import chord
+from music21 import base
+from music21 import beam
+from music21 import sites
+from music21 import spanner
+from music21.common.numberTools import opFrac
+
+from composer_toolkit.note_array import NoteArray
 
 __all__ = [
     "convert_stream",
     "notes_to_stream",
     "durations_to_stream",
+    "arrays_to_stream",
     "merge_streams",
     "append_stream",
+    "concatenate_streams",
+    "clone",
 ]
 
+_ElementT = TypeVar(
+    "_ElementT", bound=Union[note.GeneralNote, stream.Stream, pitch.Pitch, duration.Duration]
+)
+
+# Attributes of notes holding objects that are copied only when they are set.
+_OPTIONAL_PAYLOADS = ("_style", "_editorial", "_tie", "_volume")
+# Attributes of pitches holding immutable values, and the attributes of accidentals.
+_PITCH_SCALARS = frozenset(
+    ("_step", "_overridden_freq440", "_octave", "spellingIsInferred", "_client", "_accidental")
+)
+_ACCIDENTAL_SLOTS = tuple(pitch.Accidental()._getSlotsRecursive())
+# Attributes of beams, and those holding objects that are copied only when they are set.
+_BEAM_SLOTS = tuple(beam.Beam()._getSlotsRecursive())
+_BEAM_PAYLOADS = ("_style", "_editorial")
+
 
 def convert_stream(
     original_stream: stream.Stream,
     stream_class: Type[Union[stream.Voice, stream.Part, stream.Score]],
+    in_place: bool = False,
 ) -> stream.Stream:
     """Converts a stream to a the specified type
 
     Args:
         original_stream: The Stream to convert.
         stream_class: The type of stream to convert to (Score, Part or Voice).
+        in_place: Optional; If true, the class of the original stream is changed to the specified
+          type, and the original stream is returned with its elements untouched, at their
+          original offsets. This takes constant time. By default, the elements are appended to a
+          new stream.
 
     Returns:
         Converted stream.
     """
+    if in_place:
+        return _convert_in_place(original_stream, stream_class)
+
     if stream_class is stream.Score:
         post_stream = stream.Score()
     elif stream_class is stream.Part:
@@ -67,6 +103,9 @@ def notes_to_stream(
 ) -> stream.Stream:
     """Creates a stream from a sequence of pitches.
 
+    Notes for pitch classes, midi note numbers and note names are built once and cached; the
+    stream is filled with copies of the cached notes.
+
     Args:
         pitches: Sequence of pitches to convert to a stream. Sequence can consist of pitch classes
           (0-11), midi note numbers (12+), note names (str), music21 Pitch objects, music21
@@ -75,18 +114,15 @@ def notes_to_stream(
     Returns:
         Stream containing a sequence of notes with the corresponding pitches.
     """
-    post_stream = stream.Stream()
+    notes = []
     for pitch_ in pitches:
-        if isinstance(pitch_, (str, pitch.Pitch)):
-            post_stream.append(note.Note(pitch_))
-        elif isinstance(pitch_, numbers.Number):
-            note_ = note.Note(pitch_)
-            if note_.pitch.accidental.name == "natural":
-                note_.pitch.accidental = None
-            post_stream.append(note_)
+        if isinstance(pitch_, (str, numbers.Number)):
+            notes.append(_clone_note(_note_prototype(pitch_, 1.0)))
+        elif isinstance(pitch_, pitch.Pitch):
+            notes.append(note.Note(pitch_))
         elif isinstance(pitch_, (note.Note, chord.Chord)):
-            post_stream.append(pitch_)
-    return post_stream
+            notes.append(pitch_)
+    return _sequence_to_stream(notes)
 
 
 def durations_to_stream(
@@ -94,6 +130,9 @@ def durations_to_stream(
 ):
     """Converts a sequence of durations to a Stream containing note objects of that duration.
 
+    Notes for numeric durations are built once and cached; the stream is filled with copies of
+    the cached notes.
+
     Args:
         durations: Sequence of durations to convert to a stream. Sequence can consist of numeric
           values (1 = quarter note), music21 Duration objects or music21 Note objects.
@@ -101,21 +140,93 @@ def durations_to_stream(
     Returns:
         Stream containing a sequence of notes with the corresponding durations.
     """
-    post_stream = stream.Stream()
+    notes = []
     for duration_ in durations:
         if isinstance(duration_, numbers.Number):
-            new_note = note.Note()
-            new_note.duration = duration.Duration(duration_)
-            post_stream.append(new_note)
+            notes.append(_clone_note(_note_prototype("C4", duration_)))
         elif isinstance(duration_, duration.Duration):
             new_note = note.Note()
             new_note.duration = duration_
-            post_stream.append(new_note)
+            notes.append(new_note)
         elif isinstance(duration_, note.Note):
-            post_stream.append(duration_)
+            notes.append(duration_)
+    return _sequence_to_stream(notes)
+
+
+def arrays_to_stream(
+    midi: Union[np.ndarray, Sequence[numbers.Number]],
+    quarter_lengths: Union[np.ndarray, Sequence[numbers.Number], numbers.Number] = 1.0,
+) -> stream.Stream:
+    """Creates a stream of notes from arrays of midi note numbers and durations.
+
+    Each distinct pair of pitch and duration is built once, and the stream is filled with copies
+    of it, placed one after the other.
+
+    Args:
+        midi: Array of midi note numbers, or pitch classes (0-11). NaN values create rests.
+        quarter_lengths: Optional; Array of durations in quarter notes, one for each note, or a
+          single duration for all notes. Default is 1 (quarter notes).
+
+    Returns:
+        Stream containing a sequence of notes with the corresponding pitches and durations.
+
+    Raises:
+        ValueError: If midi and quarter_lengths don't have the same length.
+    """
+    midi = np.asarray(midi, dtype=np.float64)
+    quarter_lengths = np.asarray(quarter_lengths, dtype=np.float64)
+    if midi.ndim != 1 or quarter_lengths.ndim > 1 or quarter_lengths.size not in (1, midi.size):
+        raise ValueError("midi and quarter_lengths must be one-dimensional arrays of equal length")
+    quarter_lengths = np.broadcast_to(quarter_lengths.reshape(-1), midi.shape)
+
+    # Rests are encoded as None, and whole numbers as integers, as notes_to_stream expects.
+    pitch_values, pitch_indices = np.unique(midi, return_inverse=True)
+    pitch_values = [
+        None if np.isnan(value) else int(value) if value.is_integer() else value
+        for value in pitch_values.tolist()
+    ]
+    length_values, length_indices = np.unique(quarter_lengths, return_inverse=True)
+    length_values = length_values.tolist()
+
+    prototypes = {}
+    notes = []
+    for key in zip(pitch_indices.tolist(), length_indices.tolist()):
+        prototype = prototypes.get(key)
+        if prototype is None:
+            prototype = _note_prototype(pitch_values[key[0]], length_values[key[1]])
+            prototypes[key] = prototype
+        notes.append(_clone_note(prototype))
+    return _sequence_to_stream(notes)
+
+
+def _sequence_to_stream(elements: Sequence[note.GeneralNote]) -> stream.Stream:
+    # Places the elements one after the other, as appending them would, in a single pass.
+    post_stream = stream.Stream()
+    offset = 0.0
+    for element in elements:
+        post_stream.coreInsert(offset, element, ignoreSort=True)
+        offset = opFrac(offset + element.duration.quarterLength)
+    post_stream.coreElementsChanged()
     return post_stream
 
 
+@functools.lru_cache(maxsize=4096)
+def _note_prototype(
+    pitch_value: Optional[Union[numbers.Number, str]], quarter_length: numbers.Number
+) -> note.GeneralNote:
+    # A note of the given pitch and duration to be cloned, or a rest if the pitch is None.
+    # Numbers are spelled without an explicit natural sign.
+    if pitch_value is None:
+        prototype = note.Rest(quarterLength=quarter_length)
+    else:
+        prototype = note.Note(pitch_value, quarterLength=quarter_length)
+        if isinstance(pitch_value, numbers.Number) and prototype.pitch.accidental.name == "natural":
+            prototype.pitch.accidental = None
+    # Settles the duration components, so that clones are made from the single component.
+    prototype.duration.components
+    return prototype
+
+
 def merge_streams(
     *streams: stream.Stream,
     stream_class: Optional[Type[Union[stream.Voice, stream.Part, stream.Score]]] = None
@@ -150,23 +261,69 @@ def append_stream(original_stream: stream.Stream, *streams: stream.Stream):
 
     Appends all elements of one or more streams at the end of a stream.
 
+    The elements are inserted in a single pass, in time linear in the number of elements.
+
     Args:
         original_stream: The stream to append to.
         *streams: Any number of streams to be appended to the original stream.
     """
+    _bulk_append(original_stream, streams, original_stream.highestTime)
+
+
+def concatenate_streams(
+    *streams: stream.Stream,
+    stream_class: Optional[Type[Union[stream.Voice, stream.Part, stream.Score]]] = None
+) -> stream.Stream:
+    """
+
+    Creates a new stream by combining streams horizontally, one after the other.
+
+    Equivalent to appending every stream to an empty stream with append_stream, in time linear
+    in the total number of elements. As with append_stream, the elements themselves are not
+    copied.
+
+    Args:
+        *streams: Streams to concatenate.
+        stream_class: Optional; The type of stream to convert to (Score, Part or Voice). By
+        default, a generic Stream is returned.
+
+    Returns:
+        The concatenated stream.
+    """
+    if stream_class is None:
+        post_stream = stream.Stream()
+    else:
+        post_stream = stream_class()
+    _bulk_append(post_stream, streams, 0.0)
+    return post_stream
+
+
+def _bulk_append(
+    original_stream: stream.Stream, streams: Sequence[stream.Stream], offset: float
+) -> None:
+    # Each stream starts where the previous one ends, so offsets are a running sum of their
+    # highest times. Elements are inserted without updating the caches and sort state of the
+    # stream, which is done once at the end; the elements already come in order, so the
+    # eventual sort is linear.
     for stream_ in streams:
-        h_offset = original_stream.highestTime
         for element in stream_.elements:
-            original_stream.insert(element.offset + h_offset, element)
+            original_stream.coreInsert(
+                opFrac(offset + stream_.elementOffset(element)), element, ignoreSort=True
+            )
+        offset = opFrac(offset + stream_.highestTime)
+    original_stream.coreElementsChanged()
 
 
-def streams_to_score(*streams: stream.Stream) -> stream.Score:
+def streams_to_score(*streams: stream.Stream, in_place: bool = False) -> stream.Score:
     """
 
     Combines multiple streams into a single score.
 
     Args:
         *streams: Any number of streams to be add to a score.
+        in_place: Optional; If true, the streams themselves are converted to parts with
+          convert_stream(in_place=True) and inserted into the score, without touching their
+          elements. By default, the elements are appended to new parts.
 
     Returns:
         stream.Score: A new music21 Score containing all streams.
@@ -174,44 +331,287 @@ def streams_to_score(*streams: stream.Stream) -> stream.Score:
     score = stream.Score()
     parts = []
     for s in streams:
+        if in_place:
+            parts.append(_convert_in_place(s, stream.Part))
+            continue
         part = stream.Part()
         for element in s.elements:
             part.append(element)
         parts.append(part)
 
     for part in parts:
-        score.insert(0, part)
+        score.coreInsert(0, part, ignoreSort=True)
+    score.coreElementsChanged()
     return score
 
-def augment_into_rests(*streams: stream.Stream, in_place: bool = False) -> stream.Stream:
+
+def _convert_in_place(
+    original_stream: stream.Stream, stream_class: Type[stream.Stream]
+) -> stream.Stream:
+    # Stream subclasses share the layout of Stream and only add a few attributes, which are
+    # given their default values.
+    if type(original_stream) is not stream_class:
+        original_stream.__class__ = stream_class
+        for name, value in vars(stream_class()).items():
+            original_stream.__dict__.setdefault(name, value)
+        original_stream.coreElementsChanged(clearIsSorted=False)
+    return original_stream
+
+
+def augment_into_rests(
+    *streams: Union[stream.Stream, NoteArray], in_place: bool = False
+) -> Tuple[Union[stream.Stream, NoteArray], ...]:
     """Function that takes a stream, and eliminates all rests AFTER THE FIRST PITCH
     by augmenting the previous pitch to take up the duration of the rest before the next pitch comes in
 
+    Each stream is processed in a single pass, keeping track of the last note or chord, and the
+    rests are removed all at once. Note arrays are processed with vectorized operations.
 
     Args:
-        stream (stream.Stream): Any number of streams to perform the operation on
+        streams (stream.Stream or NoteArray): Any number of streams or note arrays to perform the operation on
         in_place (bool, optional): Whether to perform the operation in place or not. Defaults to False.
 
     Returns:
-        stream.Stream: Returns instances of the streams with the operation performed, or a new streams if in_place is False
+        tuple: Returns instances of the streams with the operation performed, or a new streams if in_place is False
     """
-    
-    if not in_place:
-        streams = deepcopy(streams)
-    
-    for stream in streams:
-    
+    results = []
+    for stream_ in streams:
+        if isinstance(stream_, NoteArray):
+            results.append(_augment_array_into_rests(stream_, in_place))
+            continue
+        if not in_place:
+            stream_ = clone(stream_)
+
         # do nothing until the first note is found
-        found_first_note = False
-        
-        for n in stream.notesAndRests:
-            if isinstance(n, note.Note):
-                found_first_note = True
-            elif isinstance(n, note.Rest) and found_first_note:
+        previous_note = None
+        rests = []
+        for n in stream_.notesAndRests:
+            if not isinstance(n, note.Rest):
+                previous_note = n
+            elif previous_note is not None:
                 # augment the previous note to take up the duration of the rest
-                prev_note = stream.notesAndRests.getElementBeforeOffset(n.offset)
-                prev_note.duration.quarterLength += n.duration.quarterLength
-                # remove the rest
-                stream.remove(n)
-                
-    return streams
\ No newline at end of file
+                previous_note.duration.quarterLength += n.duration.quarterLength
+                rests.append(n)
+        _bulk_remove(stream_, rests)
+        results.append(stream_)
+
+    return tuple(results)
+
+
+def _augment_array_into_rests(array: NoteArray, in_place: bool) -> NoteArray:
+    # Works on events: each rest is attributed to the last sounding event before it, rests with
+    # no sounding event before them being left alone.
+    starts = np.flatnonzero(np.diff(array.event, prepend=-1))
+    event_rows = np.cumsum(np.diff(array.event, prepend=-1) != 0) - 1
+    event_rest = array.rest[starts]
+    event_length = array.quarter_length[starts]
+    sounding_event = np.cumsum(~event_rest) - 1
+    merged = event_rest & (sounding_event >= 0)
+
+    added_length = np.bincount(
+        sounding_event[merged], weights=event_length[merged], minlength=int(np.sum(~event_rest))
+    )
+    event_length = event_length.copy()
+    event_length[~event_rest] += added_length
+
+    keep = ~merged[event_rows]
+    arrays = dict(
+        ps=array.ps[keep],
+        step=array.step[keep],
+        alter=array.alter[keep],
+        offset=array.offset[keep],
+        quarter_length=event_length[event_rows][keep],
+        rest=array.rest[keep],
+        chord=array.chord[keep],
+        event=array.event[keep],
+        lyric=array.lyric[keep],
+    )
+    if not in_place:
+        return NoteArray(lyrics=array.lyrics, **arrays)
+    for name, value in arrays.items():
+        setattr(array, name, value)
+    return array
+
+
+def _bulk_remove(original_stream: stream.Stream, elements: Sequence[base.Music21Object]):
+    # Same as original_stream.remove(elements), which looks up and removes the elements one at a
+    # time, in a single pass over the elements of the stream.
+    if not elements:
+        return
+    removed = {id(element) for element in elements}
+    original_stream._elements = [
+        element for element in original_stream._elements if id(element) not in removed
+    ]
+    for element in elements:
+        del original_stream._offsetDict[id(element)]
+        element.sites.remove(original_stream)
+        element.activeSite = None
+    original_stream.coreElementsChanged(clearIsSorted=False)
+
+
+def clone(element: _ElementT) -> _ElementT:
+    """Creates an independent copy of a note, chord, rest, stream, pitch or duration.
+
+    A faster alternative to copy.deepcopy for music21 objects. Streams are copied element by
+    element; the pitches, durations, ties, beams and volumes of notes are copied, but their
+    lyric, expression and articulation objects are shared with the original, in new lists. The
+    sites and derivation of the original objects are not walked. Streams containing spanners
+    are copied with copy.deepcopy, so that the spanners refer to the copied elements.
+
+    Args:
+        element: The note, chord, rest, stream, pitch or duration to copy. Other music21 objects
+          are copied with copy.deepcopy.
+
+    Returns:
+        The copy, which is not in any stream.
+    """
+    if (
+        isinstance(element, stream.Stream)
+        and element.recurse().getElementsByClass(spanner.Spanner).first() is not None
+    ):
+        return copy.deepcopy(element)
+    return _clone_element(element)
+
+
+def _clone_element(element: _ElementT) -> _ElementT:
+    if isinstance(element, stream.Stream):
+        return _clone_stream(element)
+    if isinstance(element, note.GeneralNote):
+        return _clone_note(element)
+    if isinstance(element, pitch.Pitch):
+        return _clone_pitch(element)
+    if isinstance(element, duration.Duration):
+        return _clone_duration(element)
+    return copy.deepcopy(element, {id(element.sites): sites.Sites()})
+
+
+def _clone_stream(original_stream: stream.Stream) -> stream.Stream:
+    new_stream = _clone_base(original_stream)
+    new_stream._elements = []
+    new_stream._endElements = []
+    new_stream._offsetDict = {}
+    new_stream.streamStatus = copy.copy(original_stream.streamStatus)
+    new_stream.streamStatus.client = new_stream
+    for element in original_stream._elements:
+        new_stream.coreInsert(
+            original_stream.elementOffset(element), _clone_element(element), ignoreSort=True
+        )
+    for element in original_stream._endElements:
+        new_stream.coreStoreAtEnd(_clone_element(element))
+    new_stream.coreElementsChanged(clearIsSorted=False)
+    return new_stream
+
+
+def _clone_note(original_note: note.GeneralNote) -> note.GeneralNote:
+    new_note = _clone_base(original_note)
+    new_note._duration = _clone_duration(original_note.duration)
+    new_note._duration.client = new_note
+    # Lyrics, expressions and articulations are replaced rather than modified by the toolkit, so
+    # the objects are shared and only the lists are new.
+    new_note.lyrics = list(original_note.lyrics)
+    new_note.expressions = list(original_note.expressions)
+    new_note.articulations = list(original_note.articulations)
+    for name in _OPTIONAL_PAYLOADS:
+        value = getattr(original_note, name, None)
+        if value is not None:
+            setattr(new_note, name, copy.deepcopy(value))
+    if isinstance(original_note, note.NotRest):
+        if original_note.beams:
+            new_note.beams = _clone_beams(original_note.beams)
+        else:
+            new_note.beams = beam.Beams()
+        if new_note._volume is not None:
+            new_note._volume.client = new_note
+    if isinstance(original_note, note.Note):
+        new_note.pitch = _clone_pitch(original_note.pitch)
+        new_note.pitch._client = new_note
+    elif isinstance(original_note, chord.ChordBase):
+        new_note._overrides = dict(original_note._overrides)
+        new_note._notes = [_clone_note(chord_note) for chord_note in original_note._notes]
+        for chord_note in new_note._notes:
+            chord_note._chordAttached = new_note
+            if chord_note._volume is not None:
+                chord_note._volume.client = new_note
+    return new_note
+
+
+def _clone_pitch(original_pitch: pitch.Pitch) -> pitch.Pitch:
+    # Same result as Pitch.__deepcopy__, without looking up the slots of the accidental for
+    # every copy.
+    if type(original_pitch) is not pitch.Pitch or type(original_pitch.accidental) not in (
+        type(None),
+        pitch.Accidental,
+    ):
+        return copy.deepcopy(original_pitch)
+    new_pitch = pitch.Pitch.__new__(pitch.Pitch)
+    new_state = new_pitch.__dict__
+    new_state.update(original_pitch.__dict__)
+    for name, value in new_state.items():
+        if value is not None and name not in _PITCH_SCALARS:
+            new_state[name] = copy.deepcopy(value)
+    if original_pitch._accidental is not None:
+        new_accidental = pitch.Accidental.__new__(pitch.Accidental)
+        for name in _ACCIDENTAL_SLOTS:
+            setattr(new_accidental, name, getattr(original_pitch._accidental, name))
+        new_pitch._accidental = new_accidental
+    new_pitch._client = None
+    return new_pitch
+
+
+def _clone_beams(original_beams: beam.Beams) -> beam.Beams:
+    # Same result as copy.deepcopy, which goes through the generic slot pickling of every beam.
+    if type(original_beams) is not beam.Beams or any(
+        type(original_beam) is not beam.Beam for original_beam in original_beams.beamsList
+    ):
+        return copy.deepcopy(original_beams)
+    new_beams = beam.Beams.__new__(beam.Beams)
+    new_beams.feathered = original_beams.feathered
+    new_beams.id = original_beams.id
+    new_beams.beamsList = []
+    for original_beam in original_beams.beamsList:
+        new_beam = beam.Beam.__new__(beam.Beam)
+        for name in _BEAM_SLOTS:
+            setattr(new_beam, name, getattr(original_beam, name))
+        for name in _BEAM_PAYLOADS:
+            value = getattr(original_beam, name)
+            if value is not None:
+                setattr(new_beam, name, copy.deepcopy(value))
+        new_beams.beamsList.append(new_beam)
+    return new_beams
+
+
+def _clone_duration(original_duration: duration.Duration) -> duration.Duration:
+    # Most durations are fully described by their quarter length, or by a single immutable
+    # component and its tuplets, and are rebuilt from them, which is what deepcopy does for
+    # durations without tuplets. Durations whose components are out of date are described by
+    # their quarter length; reading their components would update them and inform the original
+    # note.
+    if type(original_duration) is duration.Duration and original_duration.linked:
+        if original_duration._componentsNeedUpdating:
+            return duration.Duration(original_duration.quarterLength)
+        components = original_duration.components
+        if len(components) == 1:
+            new_duration = duration.Duration(durationTuple=components[0])
+            if original_duration.tuplets:
+                # Tuplets only hold immutable values, but their notation is set per note.
+                new_duration.tuplets = [copy.copy(tuplet) for tuplet in original_duration.tuplets]
+            # Computing the quarter length before the duration has a client keeps it from
+            # informing the sites of the note once it is in a stream.
+            new_duration.quarterLength
+            return new_duration
+    return copy.deepcopy(original_duration)
+
+
+def _clone_base(original: _ElementT) -> _ElementT:
+    # A shallow copy shares every attribute with the original; the attributes tying the object
+    # to its sites are then reset, as copy.deepcopy does.
+    new = object.__new__(type(original))
+    new.__setstate__(dict(original.__dict__))
+    new._activeSite = None
+    new._activeSiteStoredOffset = None
+    new._derivation = None
+    new._cache = {}
+    new.sites = sites.Sites()
+    new.groups = base.Groups()
+    new.groups.extend(original.groups)
+    return new
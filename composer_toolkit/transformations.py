@@ -1,6 +1,10 @@
 """
 Module for transformations such as transposition and inversion.
 
+The transformations are reentrant and may run concurrently in several threads: scales are only
+read through their immutable lookup tables, or walked through private copies, and streams are
+only modified when processed in place, in which case they must not be shared between threads.
+
 This file incorporates and extends code covered by the following license:
 
     MIT License
@@ -19,28 +23,60 @@ This file incorporates and extends code covered by the following license:
     
 """
 
-import copy
-from typing import Union
+import collections.abc
+from typing import Dict, Iterator, List, NamedTuple, Optional, Sequence, Tuple, Union
 
+import numpy as np
+from music21 import bar
+from music21 import note
 from music21 import pitch
 from music21 import scale
 from music21 import stream
-
-__all__ = ["scalar_transposition", "scalar_inversion", "octave_shift"]
+from music21.common.numberTools import opFrac
+
+from composer_toolkit import scales
+from composer_toolkit import tools
+from composer_toolkit.note_array import NoteArray
+from composer_toolkit.note_array import STEPS
+
+__all__ = [
+    "scalar_transposition",
+    "scalar_inversion",
+    "octave_shift",
+    "retrograde",
+    "spell_array",
+    "TransformationChain",
+    "RowForms",
+    "row_forms",
+]
+
+# Pitch sequences that can be transformed besides streams: arrays of pitch space values, and note
+# arrays.
+PitchArray = Union[np.ndarray, NoteArray]
+
+# Reference scale used when none is given. Its table is built up front, so that concurrent calls
+# only ever read it.
+_CHROMATIC_SCALE = scale.ChromaticScale("C")
+scales.scale_table(_CHROMATIC_SCALE)
 
 
 def scalar_transposition(
-    original_stream: stream.Stream,
+    original_stream: Union[stream.Stream, PitchArray],
     steps: int,
-    reference_scale: scale.ConcreteScale = scale.ChromaticScale("C"),
+    reference_scale: Optional[scale.ConcreteScale] = None,
     in_place: bool = False,
-) -> stream.Stream:
+) -> Union[stream.Stream, PitchArray]:
     """Performs scale-space transpotition on a stream.
 
     Transposes all notes in a stream by a specified amount of scale steps in a specific scale space.
 
+    An array of pitch space values or a NoteArray can be given instead of a stream, in which case
+    all the pitches are transposed at once with vectorized operations. Note arrays are respelled
+    in the reference scale. Arrays can only be transposed in scales with a lookup table (see
+    scales.scale_table).
+
     Args:
-        original_stream: The stream to process.
+        original_stream: The stream, array of pitch space values or note array to process.
         steps: The amount of steps to transpose. Positive values transpose up, negative values
           transpose down.
         reference_scale: Optional; The scale to use as reference. By default, the chromatic scale
@@ -49,28 +85,47 @@ def scalar_transposition(
           default, a new Stream object is returned.
 
     Returns:
-        The transposed stream.
+        The transposed stream, or array if an array was given.
+
+    Raises:
+        ValueError: If an array is given with a scale that has no lookup table.
     """
+    reference_scale = _resolve_scale(reference_scale)
+    if isinstance(original_stream, (np.ndarray, NoteArray)):
+        table = _array_scale_table(reference_scale)
+        index, in_scale = table.index_array(_array_ps(original_stream))
+        if steps < 0:
+            index[~in_scale] += 1
+        moved = ~np.isnan(_array_ps(original_stream)) & (steps != 0)
+        return _set_array_degrees(
+            original_stream, index + steps, moved, steps < 0, table, in_place
+        )
+
     # Check if stream is to be processed in place
-    post_stream = original_stream if in_place else copy.deepcopy(original_stream)
+    post_stream = original_stream if in_place else tools.clone(original_stream)
 
     # Transpose all individual pitches
+    reference_scale, table = _scale_and_table(reference_scale)
     for pitch_ in post_stream.pitches:
-        _transpose_pitch_in_scale_space(pitch_, steps, reference_scale)
+        _transpose_pitch_in_scale_space(pitch_, steps, reference_scale, table)
 
     return post_stream
 
 
 def scalar_inversion(
-    original_stream: stream.Stream,
+    original_stream: Union[stream.Stream, PitchArray],
     inversion_axis: Union[str, pitch.Pitch],
-    reference_scale: scale.ConcreteScale = scale.ChromaticScale("C"),
+    reference_scale: Optional[scale.ConcreteScale] = None,
     in_place: bool = False,
-) -> stream.Stream:
+) -> Union[stream.Stream, PitchArray]:
     """Performs a scale-space inversion on a stream.
 
+    Pitches that are not in the reference scale are left as they are. As with
+    scalar_transposition, an array of pitch space values or a NoteArray can be given instead of
+    a stream.
+
     Args:
-        original_stream: The stream to process.
+        original_stream: The stream, array of pitch space values or note array to process.
         inversion_axis: The pitch around which to execute the inversion.
         reference_scale: Optional; The scale to use as reference. By default, the chromatic scale is
           used.
@@ -78,80 +133,129 @@ def scalar_inversion(
           default, a new Stream object is returned.
 
     Returns:
-        The inverted stream.
-    """
-    # Check if stream is to be processed in place
-    post_stream = original_stream if in_place else copy.deepcopy(original_stream)
+        The inverted stream, or array if an array was given.
 
+    Raises:
+        ValueError: If an array is given with a scale that has no lookup table.
+    """
     # Check if inversion_axis is Pitch
     if isinstance(inversion_axis, str):
         inversion_axis = pitch.Pitch(inversion_axis)
 
+    reference_scale = _resolve_scale(reference_scale)
+    if isinstance(original_stream, (np.ndarray, NoteArray)):
+        table = _array_scale_table(reference_scale)
+        index, in_scale = table.index_array(_array_ps(original_stream))
+        axis_index, axis_in_scale = table.index(inversion_axis.ps)
+        distance = index - axis_index
+        if not axis_in_scale:
+            distance[distance <= 0] -= 1
+        moved = in_scale & (distance != 0)
+        return _set_array_degrees(
+            original_stream, index - 2 * distance, moved, distance > 0, table, in_place
+        )
+
+    # Check if stream is to be processed in place
+    post_stream = original_stream if in_place else tools.clone(original_stream)
+
     # Invert all individual pitches
+    reference_scale, table = _scale_and_table(reference_scale)
     for pitch_ in post_stream.pitches:
-        distance_from_axis = _get_scale_distance(
-            inversion_axis, pitch_, reference_scale
-        )
-        _transpose_pitch_in_scale_space(
-            pitch_, distance_from_axis * -2, reference_scale
-        )
+        _invert_pitch_in_scale_space(pitch_, inversion_axis, reference_scale, table)
 
     return post_stream
 
 
 def retrograde(
-    original_stream: stream.Stream,
+    original_stream: Union[stream.Stream, PitchArray],
     in_place: bool = False,
-) -> stream.Stream:
+    make_measures: bool = False,
+) -> Union[stream.Stream, PitchArray]:
     """Performs a retrograde operation on a Stream.
 
+    The stream is flattened and each note, chord and rest is moved to its mirrored offset: the
+    length of the stream, minus its offset, minus its duration. Ties are turned around. Other
+    elements, such as clefs and time signatures, keep their offsets, while measures and barlines
+    are removed, and can be rebuilt at the end.
+
+    An array of pitch space values or a NoteArray can be given instead of a stream, in which case
+    the array is reversed.
+
     Args:
         original_stream: The Stream to process.
         in_place: Optional; If true, the operation is done in place on the original stream. By
           default, a new Stream object is returned.
+        make_measures: Optional; If true, the measures of the reversed stream are rebuilt with
+          makeMeasures. By default, the reversed stream has no measures.
 
     Returns:
-        The reversed Stream.
+        The reversed Stream, or array if an array was given.
     """
-    # Check if stream is to be processed in place
-    post_stream = original_stream if in_place else copy.deepcopy(original_stream)
-
-    # Extract list of notes and clear stream of bars and notes
-    notes = list(post_stream.flat.notes)
-    post_stream.removeByClass("Barline")
-    post_stream.removeByClass("Measure")
-    post_stream.remove(notes, recurse=True)
-
-    # Build new stream of notes in reverse order
-    reverse_stream = stream.Stream()
-    for note_ in reversed(notes):
-        reverse_stream.append(note_)
+    if isinstance(original_stream, (np.ndarray, NoteArray)):
+        post_array = original_stream if in_place else _copy_array(original_stream)
+        return _retrograde_array(post_array)
 
-    # Put back notes in the stream
-    for note_ in reverse_stream.notes:
-        post_stream.insert(note_.offset, note_)
-
-    post_stream.sort()
-    #post_stream.makeMeasures(inPlace=True)
+    # Check if stream is to be processed in place
+    post_stream = original_stream if in_place else tools.clone(original_stream)
+
+    # Work out the new offset of every element of the flattened stream
+    flat_stream = post_stream.flatten()
+    end = flat_stream.highestTime
+    placed = []
+    for element in flat_stream:
+        if isinstance(element, bar.Barline):
+            continue
+        offset = flat_stream.elementOffset(element)
+        if isinstance(element, note.GeneralNote):
+            offset = opFrac(end - offset - element.duration.quarterLength)
+            _reverse_tie(element)
+        placed.append((offset, element))
+
+    # Replace the contents of the stream in one go
+    kept = {id(element) for _, element in placed}
+    for element in post_stream._elements + post_stream._endElements:
+        if id(element) not in kept:
+            element.sites.remove(post_stream)
+    post_stream._elements = []
+    post_stream._endElements = []
+    post_stream._offsetDict = {}
+    for offset, element in placed:
+        post_stream.coreInsert(offset, element, ignoreSort=True)
+    post_stream.coreElementsChanged()
+
+    if make_measures:
+        post_stream.makeMeasures(inPlace=True)
 
     return post_stream
 
 
-def octave_shift(original_stream: stream.Stream, octave_interval, in_place=False):
+def octave_shift(
+    original_stream: Union[stream.Stream, PitchArray], octave_interval, in_place=False
+):
     """Transpooses a Stream up or down by a number of octaves
 
+    An array of pitch space values or a NoteArray can be given instead of a stream.
+
     Args:
-        original_stream: Stream to process.
+        original_stream: Stream, array of pitch space values or note array to process.
         octave_interval: The octave shift. Postive numbers transpose up, negative numbers transpose
           down.
         in_place: Optional; If true, the operation is done in place on the original stream. By
           default, a new Stream object is returned.
 
     Returns:
-        The transposed Stream.
+        The transposed Stream, or array if an array was given.
     """
+    if isinstance(original_stream, (np.ndarray, NoteArray)):
+        post_array = original_stream if in_place else _copy_array(original_stream)
+        if isinstance(post_array, NoteArray):
+            post_array.ps += 12 * octave_interval
+        else:
+            post_array += 12 * octave_interval
+        return post_array
+
     # Check if stream is to be processed in place
-    post_stream = original_stream if in_place else copy.deepcopy(original_stream)
+    post_stream = original_stream if in_place else tools.clone(original_stream)
 
     # Transpose all individual pitches
     for pitch_ in post_stream.pitches:
@@ -160,13 +264,550 @@ def octave_shift(original_stream: stream.Stream, octave_interval, in_place=False
     return post_stream
 
 
+class TransformationChain:
+    """
+    A sequence of transformations, recorded without being applied and then applied in one pass.
+
+    Each method of the chain returns a new chain with one more transformation, so chains can be
+    built step by step and shared. Applying a chain copies the stream once and visits each pitch
+    once: the pitch transformations are composed into a single mapping, worked out once for each
+    distinct pitch of the stream, and the retrogrades, which only reorder notes, are reduced to at
+    most one. For instance, the inversion of the retrograde of a section is
+    TransformationChain().retrograde().scalar_inversion("D3", reference_scale).apply(section).
+
+    Attributes:
+        operations: The transformations of the chain, in the order they are applied.
+    """
+
+    def __init__(self, operations: Sequence["_Operation"] = ()):
+        """Creates a chain of transformations.
+
+        Args:
+            operations: Optional; The transformations of the chain. By default, the chain is
+              empty and leaves streams as they are.
+        """
+        self.operations: Tuple[_Operation, ...] = tuple(operations)
+
+    def __len__(self) -> int:
+        return len(self.operations)
+
+    def __repr__(self) -> str:
+        return f"<TransformationChain {', '.join(repr(o) for o in self.operations)}>"
+
+    def scalar_transposition(
+        self,
+        steps: int,
+        reference_scale: Optional[scale.ConcreteScale] = None,
+    ) -> "TransformationChain":
+        """Adds a scale-space transposition to the chain. See scalar_transposition."""
+        return TransformationChain(
+            self.operations + (_Transposition(steps, _resolve_scale(reference_scale)),)
+        )
+
+    def scalar_inversion(
+        self,
+        inversion_axis: Union[str, pitch.Pitch],
+        reference_scale: Optional[scale.ConcreteScale] = None,
+    ) -> "TransformationChain":
+        """Adds a scale-space inversion to the chain. See scalar_inversion."""
+        if isinstance(inversion_axis, str):
+            inversion_axis = pitch.Pitch(inversion_axis)
+        return TransformationChain(
+            self.operations + (_Inversion(inversion_axis, _resolve_scale(reference_scale)),)
+        )
+
+    def octave_shift(self, octave_interval: int) -> "TransformationChain":
+        """Adds an octave shift to the chain. See octave_shift."""
+        return TransformationChain(self.operations + (_OctaveShift(octave_interval),))
+
+    def retrograde(self) -> "TransformationChain":
+        """Adds a retrograde to the chain. See retrograde."""
+        return TransformationChain(self.operations + (_Retrograde(),))
+
+    def apply(
+        self, original_stream: Union[stream.Stream, PitchArray], in_place: bool = False
+    ) -> Union[stream.Stream, PitchArray]:
+        """Applies the transformations of the chain to a stream.
+
+        The result is the same as applying the transformations one after the other.
+
+        Args:
+            original_stream: The stream to process. As with the individual transformations, an
+              array of pitch space values or a NoteArray can be given instead.
+            in_place: Optional; If true, the operation is done in place on the original stream. By
+              default, a new Stream object is returned.
+
+        Returns:
+            The transformed stream, or array if an array was given.
+
+        Raises:
+            ValueError: If an array is given and a transformation uses a scale that has no lookup
+              table.
+        """
+        pitch_operations, reverse = self._fuse()
+
+        if isinstance(original_stream, (np.ndarray, NoteArray)):
+            post_array = original_stream if in_place else _copy_array(original_stream)
+            for operation in pitch_operations:
+                post_array = operation.apply(post_array, in_place=True)
+            if reverse:
+                post_array = _retrograde_array(post_array)
+            return post_array
+
+        # Check if stream is to be processed in place
+        post_stream = original_stream if in_place else tools.clone(original_stream)
+
+        # Map all individual pitches, each distinct pitch being transformed once
+        tables = []
+        for position, operation in enumerate(pitch_operations):
+            if isinstance(operation, _OctaveShift):
+                tables.append(None)
+                continue
+            reference_scale, table = _scale_and_table(operation.reference_scale)
+            pitch_operations[position] = operation._replace(reference_scale=reference_scale)
+            tables.append(table)
+        mapping: Dict[Tuple[str, float], Optional[pitch.Pitch]] = {}
+        for pitch_ in post_stream.pitches:
+            key = (pitch_.nameWithOctave, pitch_.microtone.cents)
+            if key not in mapping:
+                mapping[key] = _map_pitch(pitch_, pitch_operations, tables)
+            if mapping[key] is not None:
+                _set_pitch(pitch_, mapping[key])
+
+        if reverse:
+            retrograde(post_stream, in_place=True)
+
+        return post_stream
+
+    def _fuse(self) -> Tuple[List["_Operation"], bool]:
+        # Retrogrades commute with pitch transformations and cancel out in pairs, and consecutive
+        # octave shifts add up.
+        pitch_operations: List[_Operation] = []
+        reverse = False
+        for operation in self.operations:
+            if isinstance(operation, _Retrograde):
+                reverse = not reverse
+            elif isinstance(operation, _OctaveShift) and pitch_operations and isinstance(
+                pitch_operations[-1], _OctaveShift
+            ):
+                pitch_operations[-1] = _OctaveShift(
+                    pitch_operations[-1].octave_interval + operation.octave_interval
+                )
+            else:
+                pitch_operations.append(operation)
+        return pitch_operations, reverse
+
+
+class _Transposition(NamedTuple):
+    steps: int
+    reference_scale: scale.ConcreteScale
+
+    def apply(self, original: PitchArray, in_place: bool) -> PitchArray:
+        return scalar_transposition(original, self.steps, self.reference_scale, in_place)
+
+    def apply_to_pitch(self, pitch_: pitch.Pitch, table: Optional[scales.ScaleTable]):
+        _transpose_pitch_in_scale_space(pitch_, self.steps, self.reference_scale, table)
+
+
+class _Inversion(NamedTuple):
+    inversion_axis: pitch.Pitch
+    reference_scale: scale.ConcreteScale
+
+    def apply(self, original: PitchArray, in_place: bool) -> PitchArray:
+        return scalar_inversion(original, self.inversion_axis, self.reference_scale, in_place)
+
+    def apply_to_pitch(self, pitch_: pitch.Pitch, table: Optional[scales.ScaleTable]):
+        _invert_pitch_in_scale_space(pitch_, self.inversion_axis, self.reference_scale, table)
+
+
+class _OctaveShift(NamedTuple):
+    octave_interval: int
+
+    def apply(self, original: PitchArray, in_place: bool) -> PitchArray:
+        return octave_shift(original, self.octave_interval, in_place)
+
+    def apply_to_pitch(self, pitch_: pitch.Pitch, table: None):
+        pitch_.ps += 12 * self.octave_interval
+
+
+class _Retrograde(NamedTuple):
+    pass
+
+
+_Operation = Union[_Transposition, _Inversion, _OctaveShift, _Retrograde]
+
+
+def _map_pitch(
+    original_pitch: pitch.Pitch,
+    operations: Sequence[_Operation],
+    tables: Sequence[Optional[scales.ScaleTable]],
+) -> Optional[pitch.Pitch]:
+    # Returns the pitch that original_pitch becomes, or None if it is left as it is.
+    new_pitch = tools.clone(original_pitch)
+    for operation, table in zip(operations, tables):
+        operation.apply_to_pitch(new_pitch, table)
+    if (new_pitch.nameWithOctave, new_pitch.microtone.cents) == (
+        original_pitch.nameWithOctave,
+        original_pitch.microtone.cents,
+    ):
+        return None
+    return new_pitch
+
+
+def _set_pitch(pitch_: pitch.Pitch, new_pitch: pitch.Pitch):
+    pitch_.step = new_pitch.step
+    pitch_.octave = new_pitch.octave
+    if new_pitch.accidental is None:
+        pitch_.accidental = None
+    else:
+        pitch_.accidental = pitch.Accidental(new_pitch.accidental.name)
+    if pitch_.microtone.cents != new_pitch.microtone.cents:
+        pitch_.microtone = new_pitch.microtone.cents
+
+
+def row_forms(
+    original_stream: Union[stream.Stream, PitchArray],
+    reference_scale: Optional[scale.ConcreteScale] = None,
+    inversion_axis: Union[str, pitch.Pitch, None] = None,
+    transpositions: Optional[Sequence[int]] = None,
+    forms: Sequence[str] = ("P", "I", "R", "RI"),
+    as_arrays: bool = False,
+) -> "RowForms":
+    """Generates the prime, inversion, retrograde and retrograde-inversion forms of a row.
+
+    Forms are named after their type and their transposition in scale steps, relative to the
+    original: "P0" is the original, "I0" its inversion around inversion_axis, "R3" the retrograde
+    of "P3" and "RI3" the retrograde of "I3". With the chromatic scale and the default
+    transpositions, this gives the 48 forms of a twelve-tone row.
+
+    The source is decoded once and the pitches of all the forms are worked out together with
+    vectorized operations on the reference scale's lookup table. Forms are returned as note
+    arrays, or as streams which are only built when they are first looked up.
+
+    Args:
+        original_stream: The row: a stream, an array of pitch space values or a note array.
+        reference_scale: Optional; The scale to use as reference. By default, the chromatic scale
+          is used.
+        inversion_axis: Optional; The pitch around which inversions are made. By default, the
+          first pitch of the row is used.
+        transpositions: Optional; The transpositions to generate, in scale steps. By default, one
+          for each degree of an octave of the reference scale.
+        forms: Optional; The types of form to generate, among "P", "I", "R" and "RI". By default,
+          all of them are generated.
+        as_arrays: Optional; If true, forms of a stream are returned as note arrays instead of
+          streams.
+
+    Returns:
+        The forms, as a mapping from their names to streams or arrays of the same kind as the
+        original.
+
+    Raises:
+        ValueError: If the reference scale has no lookup table, a form type is unknown, the row
+          has no pitches and no inversion axis is given, or a stream contains elements that
+          can't be stored in a NoteArray.
+    """
+    table = _array_scale_table(_resolve_scale(reference_scale))
+    unknown = set(forms) - {"P", "I", "R", "RI"}
+    if unknown:
+        raise ValueError(f"unknown row form types: {sorted(unknown)}")
+    if transpositions is None:
+        transpositions = range(len(table))
+    levels = np.asarray(list(transpositions), dtype=np.int64)[:, np.newaxis]
+
+    source_stream = original_stream if isinstance(original_stream, stream.Stream) else None
+    if source_stream is not None:
+        source = NoteArray.from_stream(source_stream)
+    elif isinstance(original_stream, NoteArray):
+        source = original_stream
+    else:
+        source = np.asarray(original_stream, dtype=np.float64)
+    ps = _array_ps(source)
+    sounding = ~np.isnan(ps)
+
+    if inversion_axis is None:
+        if not np.any(sounding):
+            raise ValueError("the inversion axis of a row without pitches must be given")
+        inversion_axis = pitch.Pitch(ps=float(ps[sounding][0]))
+    elif isinstance(inversion_axis, str):
+        inversion_axis = pitch.Pitch(inversion_axis)
+
+    # Degrees of the prime and of the inversion, as in scalar_transposition and scalar_inversion
+    index, in_scale = table.index_array(ps)
+    axis_index, axis_in_scale = table.index(inversion_axis.ps)
+    distance = index - axis_index
+    if not axis_in_scale:
+        distance[distance <= 0] -= 1
+    inverted = in_scale & (distance != 0)
+
+    # One row of pitches for each transposition of each of the prime and the inversion
+    rows = {}
+    for base, base_index, base_moved, base_descending, needed_by in (
+        ("P", index, np.zeros_like(sounding), False, ("P", "R")),
+        ("I", np.where(inverted, index - 2 * distance, index), inverted, distance > 0, ("I", "RI")),
+    ):
+        if not set(needed_by) & set(forms):
+            continue
+        # Pitches outside the scale step from their upper neighbour when going down
+        new_index = base_index + ((levels < 0) & ~in_scale) + levels
+        moved = np.where(levels != 0, sounding, base_moved)
+        descending = np.where(levels != 0, levels < 0, base_descending)
+        rows[base] = (moved, new_index, np.broadcast_to(descending, new_index.shape))
+
+    return RowForms(
+        source, source_stream, table, rows, levels[:, 0].tolist(), forms, as_arrays
+    )
+
+
+class RowForms(collections.abc.Mapping):
+    """
+    The forms of a row generated by row_forms, as a read-only mapping from their names to streams
+    or arrays.
+
+    The pitches of all the forms are computed up front; streams are built the first time they are
+    looked up and then kept.
+    """
+
+    def __init__(
+        self,
+        source: PitchArray,
+        source_stream: Optional[stream.Stream],
+        table: scales.ScaleTable,
+        rows: Dict[str, Tuple[np.ndarray, np.ndarray, np.ndarray]],
+        transpositions: Sequence[int],
+        forms: Sequence[str],
+        as_arrays: bool,
+    ):
+        # Use row_forms to create RowForms
+        self._source = source
+        self._source_stream = source_stream
+        self._table = table
+        self._rows = rows
+        self._as_arrays = as_arrays or source_stream is None
+        self._names = {
+            f"{form}{level}": (form, position)
+            for form in ("P", "I", "R", "RI")
+            if form in forms
+            for position, level in enumerate(transpositions)
+        }
+        self._streams: Dict[str, stream.Stream] = {}
+
+    def __getitem__(self, name: str) -> Union[stream.Stream, PitchArray]:
+        if name not in self._names:
+            raise KeyError(name)
+        if self._as_arrays:
+            return self.array(name)
+        if name not in self._streams:
+            # Forms looked up concurrently may be built twice, but the same one is kept
+            self._streams.setdefault(name, self._build_stream(name))
+        return self._streams[name]
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._names)
+
+    def __len__(self) -> int:
+        return len(self._names)
+
+    def __repr__(self) -> str:
+        return f"<RowForms {len(self)} forms>"
+
+    def array(self, name: str) -> PitchArray:
+        """Returns a form as an array, whether or not the row was given as a stream.
+
+        Args:
+            name: The name of the form, such as "RI3".
+
+        Returns:
+            A new note array, or array of pitch space values if the row was given as one.
+        """
+        form, position = self._names[name]
+        moved, index, descending = self._row(form, position)
+        post_array = _copy_array(self._source)
+        ps = self._table.ps_array(index[moved])
+        if isinstance(post_array, NoteArray):
+            post_array.ps[moved] = ps
+            post_array.step[moved], post_array.alter[moved] = self._table.spelling_array(
+                index[moved], descending[moved]
+            )
+        else:
+            post_array[moved] = ps
+        if form.startswith("R"):
+            post_array = _retrograde_array(post_array)
+        return post_array
+
+    def _row(self, form: str, position: int) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        moved, index, descending = self._rows["I" if form.endswith("I") else "P"]
+        return moved[position], index[position], descending[position]
+
+    def _build_stream(self, name: str) -> stream.Stream:
+        # Sets the changed pitches of a copy of the row, visited in the order of the note array.
+        form, position = self._names[name]
+        moved, index, descending = self._row(form, position)
+        post_stream = tools.clone(self._source_stream)
+        pitches = [
+            pitch_
+            for element in post_stream.flatten().notesAndRests
+            for pitch_ in ((None,) if element.isRest else element.pitches)
+        ]
+        for row in np.flatnonzero(moved).tolist():
+            self._table.spell_pitch(pitches[row], int(index[row]), bool(descending[row]))
+        if form.startswith("R"):
+            retrograde(post_stream, in_place=True)
+        return post_stream
+
+
+def spell_array(
+    ps: np.ndarray,
+    reference_scale: Optional[scale.ConcreteScale] = None,
+    descending: Union[bool, np.ndarray] = False,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """Spells an array of pitch space values in a scale.
+
+    This is the spelling pass for pitches transformed as plain arrays, giving the step codes and
+    alterations that make up a NoteArray along with the pitch space values. Pitches in the scale are
+    spelled as the scale spells them, other pitches as music21 spells them by default.
+
+    Args:
+        ps: The pitch space values to spell. NaN values are spelled as rests.
+        reference_scale: Optional; The scale to spell the pitches in. By default, the chromatic
+          scale is used.
+        descending: Optional; Whether to use the descending spelling of the scale, for all the
+          pitches or for each of them. By default, the ascending spelling is used.
+
+    Returns:
+        A tuple of an array of step codes, as indices into note_array.STEPS (-1 for rests), and an
+        array of alterations, NaN for pitches without an accidental.
+
+    Raises:
+        ValueError: If the scale has no lookup table.
+    """
+    table = _array_scale_table(_resolve_scale(reference_scale))
+    ps = np.asarray(ps, dtype=np.float64)
+    index, in_scale = table.index_array(ps)
+    step, alter = table.spelling_array(index, descending)
+    step = np.where(np.isnan(ps), -1, step).astype(np.int8)
+    alter = alter.copy()
+    alter[np.isnan(ps)] = np.nan
+
+    # Pitches outside the scale take music21's spelling, worked out once per value
+    outside = ~in_scale & ~np.isnan(ps)
+    values, inverse = np.unique(ps[outside], return_inverse=True)
+    spellings = [pitch.Pitch(ps=value) for value in values.tolist()]
+    step[outside] = np.array([STEPS.index(p.step) for p in spellings], dtype=np.int8)[inverse]
+    alter[outside] = np.array(
+        [np.nan if p.accidental is None else p.accidental.alter for p in spellings],
+        dtype=np.float32,
+    )[inverse]
+    return step, alter
+
+
+def _resolve_scale(reference_scale: Optional[scale.ConcreteScale]) -> scale.ConcreteScale:
+    return _CHROMATIC_SCALE if reference_scale is None else reference_scale
+
+
+def _scale_and_table(
+    reference_scale: scale.ConcreteScale,
+) -> Tuple[scale.ConcreteScale, Optional[scales.ScaleTable]]:
+    # Scales without a table are walked with nextPitch, which changes the caches of their interval
+    # network, so a private copy is walked instead of the caller's scale.
+    table = scales.scale_table(reference_scale)
+    if table is None:
+        reference_scale = scales.isolated_copy(reference_scale)
+    return reference_scale, table
+
+
+def _array_scale_table(reference_scale: scale.ConcreteScale) -> scales.ScaleTable:
+    table = scales.scale_table(reference_scale)
+    if table is None:
+        raise ValueError(
+            f"{reference_scale} has no lookup table, so arrays can't be transformed in it"
+        )
+    return table
+
+
+def _array_ps(original_array: PitchArray) -> np.ndarray:
+    if isinstance(original_array, NoteArray):
+        return original_array.ps
+    return np.asarray(original_array, dtype=np.float64)
+
+
+def _copy_array(original_array: PitchArray) -> PitchArray:
+    if not isinstance(original_array, NoteArray):
+        return np.array(original_array, dtype=np.float64)
+    return NoteArray(
+        original_array.ps.copy(),
+        original_array.step.copy(),
+        original_array.alter.copy(),
+        original_array.offset,
+        original_array.quarter_length,
+        original_array.rest,
+        original_array.chord,
+        original_array.event,
+        original_array.lyric,
+        original_array.lyrics,
+    )
+
+
+def _retrograde_array(original_array: PitchArray) -> PitchArray:
+    # Reverses an array in place. The events of a note array are reversed and moved to mirrored
+    # offsets, and the pitches of each chord keep their order.
+    if not isinstance(original_array, NoteArray):
+        original_array[:] = original_array[::-1].copy()
+        return original_array
+    if len(original_array) == 0:
+        return original_array
+    end = np.max(original_array.offset + original_array.quarter_length)
+    order = np.lexsort((np.arange(len(original_array)), -original_array.event))
+    offset = end - original_array.offset - original_array.quarter_length
+    event = original_array.event[order]
+    arrays = dict(
+        ps=original_array.ps[order],
+        step=original_array.step[order],
+        alter=original_array.alter[order],
+        offset=offset[order],
+        quarter_length=original_array.quarter_length[order],
+        rest=original_array.rest[order],
+        chord=original_array.chord[order],
+        event=event[0] - event,
+        lyric=original_array.lyric[order],
+    )
+    for name, value in arrays.items():
+        setattr(original_array, name, value)
+    return original_array
+
+
+def _set_array_degrees(
+    original_array: PitchArray,
+    index: np.ndarray,
+    moved: np.ndarray,
+    descending: Union[bool, np.ndarray],
+    table: scales.ScaleTable,
+    in_place: bool,
+) -> PitchArray:
+    # Moves the pitches selected by moved to the degrees at index, spelled in the given direction.
+    post_array = original_array if in_place else _copy_array(original_array)
+    descending = np.broadcast_to(descending, moved.shape)
+    ps = table.ps_array(index[moved])
+    if not isinstance(post_array, NoteArray):
+        post_array[moved] = ps
+        return post_array
+    post_array.ps[moved] = ps
+    post_array.step[moved], post_array.alter[moved] = table.spelling_array(
+        index[moved], descending[moved]
+    )
+    return post_array
+
+
 def _transpose_pitch_in_scale_space(
     original_pitch: pitch.Pitch,
     steps: int,
     reference_scale: scale.ConcreteScale,
-) -> pitch.Pitch:
+    table: Optional[scales.ScaleTable] = None,
+) -> None:
     if steps == 0:
         return
+    if table is not None:
+        table.transpose_pitch(original_pitch, steps)
+        return
     if steps > 0:
         direction = scale.Direction.ASCENDING
     else:
@@ -178,6 +819,31 @@ def _transpose_pitch_in_scale_space(
     original_pitch.accidental = new_pitch.accidental
 
 
+def _reverse_tie(general_note: note.GeneralNote):
+    # A tie starting on a note ends on it once the notes are reversed, and the other way around.
+    for tied in getattr(general_note, "notes", ()) or (general_note,):
+        if tied.tie is not None and tied.tie.type in ("start", "stop"):
+            tied.tie.type = "stop" if tied.tie.type == "start" else "start"
+
+
+def _invert_pitch_in_scale_space(
+    original_pitch: pitch.Pitch,
+    inversion_axis: pitch.Pitch,
+    reference_scale: scale.ConcreteScale,
+    table: Optional[scales.ScaleTable] = None,
+) -> None:
+    if table is not None:
+        distance_from_axis = table.distance(inversion_axis.ps, original_pitch.ps)
+        if distance_from_axis:
+            index, _ = table.index(original_pitch.ps)
+            table.spell_pitch(
+                original_pitch, index - distance_from_axis * 2, distance_from_axis > 0
+            )
+        return
+    distance_from_axis = _get_scale_distance(inversion_axis, original_pitch, reference_scale)
+    _transpose_pitch_in_scale_space(original_pitch, distance_from_axis * -2, reference_scale)
+
+
 def _get_scale_distance(pitch_a, pitch_b, reference_scale):
     if isinstance(pitch_a, str):
         pitch_a = pitch.Pitch(pitch_a)
@@ -191,13 +857,15 @@ def _get_scale_distance(pitch_a, pitch_b, reference_scale):
     if pitch_b.ps < pitch_a.ps:
         direction = scale.Direction.DESCENDING
 
+    # Step through the scale one degree at a time until pitch_b is reached or passed
     scale_distance = 0
+    next_pitch = pitch_a
     while True:
         scale_distance += 1
-        next_pitch = reference_scale.next(pitch_a, direction, scale_distance)
+        next_pitch = reference_scale.nextPitch(next_pitch, direction)
         if next_pitch.ps == pitch_b.ps:
             break
-        if scale_distance > 1000:
+        if (next_pitch.ps > pitch_b.ps) == (direction == scale.Direction.ASCENDING):
             return 0
 
     if direction == scale.Direction.DESCENDING:
@@ -1,3 +1,5 @@
+import functools
+
 from composer_toolkit import isorhythm
 from composer_toolkit import minimalism
 from composer_toolkit import scales
@@ -21,18 +23,33 @@ basic_scale = isorhythm.create_isorhythm(
 # ----------------------------------------------------------------------------------------------------------------------
 # Build A section
 # ----------------------------------------------------------------------------------------------------------------------
-pattern_a = minimalism.additive_process(basic_scale)
-section_a = minimalism.additive_process(pattern_a)
-section_a.append(minimalism.subtractive_process(pattern_a, iterations_start=1))
+section_a = minimalism.nested_process(
+    basic_scale, minimalism.additive_process, minimalism.additive_process
+)
+section_a.append(
+    minimalism.nested_process(
+        basic_scale,
+        minimalism.additive_process,
+        functools.partial(minimalism.subtractive_process, iterations_start=1),
+    )
+)
 
 # ----------------------------------------------------------------------------------------------------------------------
 # Build B section
 # ----------------------------------------------------------------------------------------------------------------------
-pattern_b = minimalism.subtractive_process(
-    basic_scale, direction=minimalism.Direction.BACKWARD
+pattern_b = functools.partial(
+    minimalism.subtractive_process, direction=minimalism.Direction.BACKWARD
+)
+section_b = minimalism.nested_process(
+    basic_scale, pattern_b, minimalism.additive_process
+)
+section_b.append(
+    minimalism.nested_process(
+        basic_scale,
+        pattern_b,
+        functools.partial(minimalism.subtractive_process, iterations_start=1),
+    )
 )
-section_b = minimalism.additive_process(pattern_b)
-section_b.append(minimalism.subtractive_process(pattern_b, iterations_start=1))
 
 # ----------------------------------------------------------------------------------------------------------------------
 # Build remaining sections
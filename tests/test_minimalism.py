@@ -1,5 +1,10 @@
+import functools
+import itertools
+import time
 import pytest
 from music21 import converter
+from music21 import note
+from music21 import stream
 from composer_toolkit import minimalism
 from composer_toolkit import sequences
 
@@ -89,6 +94,20 @@ def test_additive_process_direction(example_stream, direction, intended_result):
     assert list(result.flat.notes) == list(intended_result.flat.notes)
 
 
+def test_additive_process_inward_speed():
+    # 200 notes played inward give 10100 output notes, each an independent copy
+    original_stream = stream.Stream(
+        [note.Note(60 + index % 24, quarterLength=0.5) for index in range(200)]
+    )
+    start = time.perf_counter()
+    result = minimalism.additive_process(original_stream, direction=minimalism.Direction.INWARD)
+    elapsed = time.perf_counter() - start
+    assert len(result.notes) == 10100
+    assert result.notes[0] is not result.notes[200]
+    # About 0.65s here; the bound leaves room for slower machines
+    assert elapsed < 1.5
+
+
 def test_additive_process_step_value_int(example_stream):
     result = minimalism.additive_process(example_stream, step_value=2)
     intended_result = converter.parse(
@@ -542,3 +561,421 @@ def test_subtractive_process_nonlinear(example_stream):
         """
     )
     assert list(result.flat.notes) == list(intended_result.flat.notes)
+
+
+def test_additive_process_offsets():
+    result = minimalism.additive_process(
+        converter.parse("tinyNotation: C4 D8 E2"), direction=minimalism.Direction.INWARD
+    )
+    assert [n.offset for n in result.flatten().notes] == [0.0, 1.0, 3.0, 4.0, 4.5]
+    assert result.highestTime == 6.5
+
+
+# Scanning Process Tests
+
+
+@pytest.fixture
+def short_stream():
+    return converter.parse("tinyNotation: C D E F G A")
+
+
+def test_scanning_process(short_stream):
+    result = minimalism.scanning_process(short_stream)
+    intended_result = converter.parse("tinyNotation: C D D E E F F G G A A")
+    assert result.isFlat
+    assert list(result.notes) == list(intended_result.flat.notes)
+
+
+@pytest.mark.parametrize(
+    "direction,intended_result",
+    [
+        (
+            minimalism.Direction.BACKWARD,
+            converter.parse("tinyNotation: G A F G E F D E C D C"),
+        ),
+        (
+            minimalism.Direction.INWARD,
+            converter.parse("tinyNotation: C D G A D E F G E F"),
+        ),
+        (
+            minimalism.Direction.OUTWARD,
+            converter.parse("tinyNotation: D E F G C D G A C A"),
+        ),
+    ],
+)
+def test_scanning_process_direction(short_stream, direction, intended_result):
+    result = minimalism.scanning_process(short_stream, direction=direction)
+    assert list(result.notes) == list(intended_result.flat.notes)
+
+
+def test_scanning_process_step_value_sequence_absolute(short_stream):
+    result = minimalism.scanning_process(
+        short_stream, step_value=sequences.PRIMES, step_mode=minimalism.StepMode.ABSOLUTE
+    )
+    intended_result = converter.parse("tinyNotation: C D E F F G A")
+    assert list(result.notes) == list(intended_result.flat.notes)
+
+
+def test_scanning_process_sequences(short_stream):
+    result = minimalism.scanning_process(
+        short_stream, step_value=[1, 2], window_size=[3, 1], repetitions=[1, 2]
+    )
+    intended_result = converter.parse("tinyNotation: C D E D D F G A G G")
+    assert list(result.notes) == list(intended_result.flat.notes)
+
+
+def test_scanning_process_iterations(short_stream):
+    result = minimalism.scanning_process(short_stream, iterations_start=2, iterations_end=4)
+    intended_result = converter.parse("tinyNotation: D E E F F G")
+    assert list(result.notes) == list(intended_result.flat.notes)
+
+
+def test_scanning_process_invalid_step(short_stream):
+    with pytest.raises(ValueError):
+        minimalism.scanning_process(short_stream, step_value=0)
+
+
+# Streaming Process Tests
+
+
+@pytest.mark.parametrize(
+    "process,iter_process",
+    [
+        (minimalism.additive_process, minimalism.iter_additive_process),
+        (minimalism.subtractive_process, minimalism.iter_subtractive_process),
+    ],
+)
+@pytest.mark.parametrize(
+    "kwargs",
+    [
+        {"direction": minimalism.Direction.FORWARD},
+        {"direction": minimalism.Direction.BACKWARD},
+        {"direction": minimalism.Direction.INWARD},
+        {"direction": minimalism.Direction.OUTWARD},
+        {"repetitions": [1, 2, 3]},
+        {"step_value": [1, 2, 3], "iterations_start": 2},
+        {"step_value": sequences.PRIMES, "step_mode": minimalism.StepMode.ABSOLUTE},
+    ],
+)
+def test_iter_process(example_stream, process, iter_process, kwargs):
+    result = list(iter_process(example_stream, **kwargs))
+    intended_result = list(process(example_stream, **kwargs).flatten().notes)
+    assert [n for _, n in result] == intended_result
+    assert [offset for offset, _ in result] == [n.offset for n in intended_result]
+
+
+@pytest.mark.parametrize(
+    "kwargs",
+    [
+        {"direction": minimalism.Direction.FORWARD},
+        {"direction": minimalism.Direction.BACKWARD},
+        {"direction": minimalism.Direction.INWARD},
+        {"direction": minimalism.Direction.OUTWARD, "repetitions": [1, 2]},
+        {"step_value": [1, 2], "window_size": [3, 1]},
+        {"step_value": sequences.PRIMES, "step_mode": minimalism.StepMode.ABSOLUTE},
+    ],
+)
+def test_iter_scanning_process(example_stream, kwargs):
+    result = list(minimalism.iter_scanning_process(example_stream, **kwargs))
+    intended_result = list(
+        minimalism.scanning_process(example_stream, **kwargs).flatten().notes
+    )
+    assert [n for _, n in result] == intended_result
+    assert [offset for offset, _ in result] == [n.offset for n in intended_result]
+
+
+def test_iter_additive_process_is_lazy(example_stream):
+    events = minimalism.iter_additive_process(example_stream, iterations_end=10**9)
+    first_events = list(itertools.islice(events, 3))
+    assert [offset for offset, _ in first_events] == [0.0, 1.0, 2.0]
+    assert [n.name for _, n in first_events] == ["C", "C", "D"]
+
+
+# Shared Element Tests
+
+
+@pytest.mark.parametrize(
+    "process", [minimalism.additive_process, minimalism.subtractive_process]
+)
+def test_process_shared(example_stream, process):
+    result = list(process(example_stream, shared=True).flatten().notes)
+    intended_result = list(process(example_stream).flatten().notes)
+    assert result == intended_result
+    assert [n.offset for n in result] == [n.offset for n in intended_result]
+
+
+def test_additive_process_shared_payloads():
+    original_stream = converter.parse("tinyNotation: C4 chord{E G} r4 D")
+    result = list(minimalism.additive_process(original_stream, shared=True).flatten().notes)
+    assert result[0] is not result[1]
+    assert result[0].pitch is result[1].pitch
+    assert result[0].duration is result[1].duration
+    assert result[2].pitches[0] is result[4].pitches[0]
+    assert original_stream.flatten().notes[0].pitch is not result[0].pitch
+
+
+# Process Size Tests
+
+
+@pytest.mark.parametrize(
+    "process,process_size",
+    [
+        (minimalism.additive_process, minimalism.additive_process_size),
+        (minimalism.subtractive_process, minimalism.subtractive_process_size),
+    ],
+)
+@pytest.mark.parametrize(
+    "kwargs",
+    [
+        {"direction": minimalism.Direction.FORWARD},
+        {"direction": minimalism.Direction.BACKWARD},
+        {"direction": minimalism.Direction.INWARD, "repetitions": [1, 2, 3]},
+        {"direction": minimalism.Direction.OUTWARD, "step_value": [1, 2, 3]},
+        {"step_value": sequences.PRIMES, "step_mode": minimalism.StepMode.ABSOLUTE},
+        {"iterations_start": 3, "iterations_end": 9},
+    ],
+)
+def test_process_size(process, process_size, kwargs):
+    original_stream = converter.parse("tinyNotation: C4 D8 E8 F2 G4. A16 B16 c4 d2 e8 f8 g1")
+    result = process(original_stream, **kwargs)
+    size = process_size(original_stream, **kwargs)
+    assert size.notes == len(result.flatten().notes)
+    assert size.quarter_length == result.highestTime
+
+
+def test_additive_process_size(example_stream):
+    size = minimalism.additive_process_size(example_stream, repetitions=2, iterations_end=8)
+    assert size == minimalism.ProcessSize(iterations=8, notes=72, quarter_length=72.0)
+
+
+# Process Map Tests
+
+
+@pytest.mark.parametrize(
+    "process,process_map",
+    [
+        (minimalism.additive_process, minimalism.additive_process_map),
+        (minimalism.subtractive_process, minimalism.subtractive_process_map),
+    ],
+)
+@pytest.mark.parametrize(
+    "kwargs",
+    [
+        {"direction": minimalism.Direction.INWARD, "repetitions": [1, 2, 3]},
+        {"direction": minimalism.Direction.OUTWARD, "step_value": [1, 2, 3]},
+    ],
+)
+def test_process_map_notes_between(process, process_map, kwargs):
+    original_stream = converter.parse("tinyNotation: C4 D8 E8 F2 G4. A16 B16 c4 d2 e8 f8 g1")
+    result = process(original_stream, **kwargs)
+    view = process_map(original_stream, **kwargs)
+    assert view.quarter_length == result.highestTime
+    for offset_start, offset_end in [(0, 3), (7.25, 31), (40.5, 41), (60, 1000)]:
+        intended_result = result.getElementsByOffset(
+            offset_start, offset_end, includeEndBoundary=False, mustBeginInSpan=True
+        )
+        notes = view.notes_between(offset_start, offset_end)
+        assert list(notes.notes) == list(intended_result.notes)
+        assert [n.offset for n in notes.notes] == [
+            n.getOffsetBySite(result) for n in intended_result.notes
+        ]
+
+
+def test_process_map_iteration(example_stream):
+    view = minimalism.additive_process_map(example_stream, repetitions=2)
+    assert len(view) == 12
+    assert view.iteration_offset(3) == 12.0
+    result = view.iteration(2)
+    intended_result = converter.parse("tinyNotation: C D E C D E")
+    assert list(result.notes) == list(intended_result.flat.notes)
+    with pytest.raises(IndexError):
+        view.iteration(12)
+
+
+# Nested Process Tests
+
+
+@pytest.mark.parametrize(
+    "outer_process",
+    [
+        minimalism.additive_process,
+        functools.partial(
+            minimalism.subtractive_process,
+            direction=minimalism.Direction.OUTWARD,
+            repetitions=[1, 2],
+            iterations_start=1,
+        ),
+        functools.partial(
+            minimalism.scanning_process, window_size=3, direction=minimalism.Direction.INWARD
+        ),
+    ],
+)
+def test_nested_process(outer_process):
+    original_stream = converter.parse("tinyNotation: C4 D8 E8 F2 G4. A16")
+    inner_process = functools.partial(
+        minimalism.subtractive_process, direction=minimalism.Direction.BACKWARD
+    )
+    result = minimalism.nested_process(original_stream, inner_process, outer_process)
+    intended_result = outer_process(inner_process(original_stream))
+    assert list(result.notes) == list(intended_result.flatten().notes)
+    assert [n.offset for n in result.notes] == [
+        n.offset for n in intended_result.flatten().notes
+    ]
+
+
+def test_nested_process_invalid(example_stream):
+    with pytest.raises(TypeError):
+        minimalism.nested_process(example_stream, sorted)
+    with pytest.raises(TypeError):
+        minimalism.nested_process(
+            example_stream,
+            functools.partial(minimalism.additive_process, minimalism.Direction.INWARD),
+        )
+
+
+# Sweep Process Tests
+
+
+def test_sweep_process(example_stream):
+    process = functools.partial(minimalism.additive_process, repetitions=2)
+    parameter_grid = {
+        "direction": [minimalism.Direction.FORWARD, minimalism.Direction.OUTWARD],
+        "step_value": [1, 2],
+    }
+    results = minimalism.sweep_process(example_stream, process, parameter_grid, max_workers=2)
+    assert [parameters for parameters, _ in results] == [
+        {"direction": direction, "step_value": step_value}
+        for direction in parameter_grid["direction"]
+        for step_value in parameter_grid["step_value"]
+    ]
+    for parameters, result in results:
+        intended_result = process(example_stream, **parameters)
+        assert list(result.notes) == list(intended_result.notes)
+        assert [n.offset for n in result.notes] == [n.offset for n in intended_result.notes]
+
+
+def test_sweep_process_summarize(example_stream):
+    parameter_grid = {"direction": list(minimalism.Direction), "iterations_start": [0, 2]}
+    results = minimalism.sweep_process(
+        example_stream,
+        minimalism.subtractive_process,
+        parameter_grid,
+        summarize=True,
+        max_workers=2,
+    )
+    for parameters, result in results:
+        assert result == minimalism.subtractive_process_size(example_stream, **parameters)
+
+
+def test_sweep_process_summarize_scanning(example_stream):
+    parameter_grid = {"window_size": [1, 3, 5], "step_value": [1, 2]}
+    results = minimalism.sweep_process(
+        example_stream,
+        minimalism.scanning_process,
+        parameter_grid,
+        summarize=True,
+        max_workers=2,
+    )
+    for parameters, result in results:
+        post_stream = minimalism.scanning_process(example_stream, **parameters)
+        assert result.notes == len(post_stream.notes)
+        assert result.quarter_length == post_stream.highestTime
+        # One iteration per window position
+        assert result.iterations == 12 // parameters["step_value"]
+
+
+def test_sweep_process_invalid(example_stream):
+    with pytest.raises(TypeError):
+        minimalism.sweep_process(example_stream, sorted, {"reverse": [True]})
+
+
+# Synchronized Process Tests
+
+
+@pytest.mark.parametrize(
+    "process",
+    [
+        functools.partial(minimalism.additive_process, direction=minimalism.Direction.INWARD),
+        functools.partial(minimalism.subtractive_process, repetitions=2),
+        functools.partial(minimalism.scanning_process, window_size=3),
+    ],
+)
+def test_synchronized_process(example_stream, process):
+    tintinnabuli_voice = converter.parse("tinyNotation: c e g c e g c e g c e g")
+    results = minimalism.synchronized_process([example_stream, tintinnabuli_voice], process)
+    for voice, result in zip([example_stream, tintinnabuli_voice], results):
+        intended_result = process(voice)
+        assert list(result.notes) == list(intended_result.flatten().notes)
+        assert [n.offset for n in result.notes] == [
+            n.offset for n in intended_result.flatten().notes
+        ]
+
+
+def test_synchronized_process_different_lengths():
+    melody = converter.parse("tinyNotation: C D E F")
+    bass = converter.parse("tinyNotation: C2 GG2")
+    melody_result, bass_result = minimalism.synchronized_process(
+        [melody, bass], minimalism.additive_process
+    )
+    assert [(n.name, n.offset) for n in melody_result.notes] == [
+        ("C", 0.0),
+        ("C", 1.0),
+        ("D", 2.0),
+        ("C", 3.0),
+        ("D", 4.0),
+        ("E", 5.0),
+        ("C", 6.0),
+        ("D", 7.0),
+        ("E", 8.0),
+        ("F", 9.0),
+    ]
+    assert [(n.name, n.offset) for n in bass_result.notes] == [
+        ("C", 0.0),
+        ("C", 1.0),
+        ("C", 3.0),
+        ("G", 5.0),
+        ("C", 6.0),
+        ("G", 8.0),
+    ]
+
+
+# Tracing Tests
+
+
+@pytest.mark.parametrize(
+    "process, kwargs",
+    [
+        (minimalism.additive_process, {"direction": minimalism.Direction.INWARD}),
+        (minimalism.subtractive_process, {"repetitions": [1, 2], "step_value": [1, 2]}),
+        (minimalism.scanning_process, {"window_size": 3, "repetitions": 2}),
+    ],
+)
+def test_process_tracer(example_stream, process, kwargs):
+    traces = []
+    result = process(example_stream, tracer=traces.append, **kwargs)
+    intended_result = process(example_stream, **kwargs)
+    assert list(result.notes) == list(intended_result.notes)
+    assert [n.offset for n in result.notes] == [n.offset for n in intended_result.notes]
+    assert [trace.index for trace in traces] == list(range(len(traces)))
+    assert sum(trace.notes for trace in traces) == len(result.notes)
+    assert traces[-1].offset == result.highestTime
+    for trace in traces:
+        assert trace.notes == trace.repetitions * sum(end - start for start, end in trace.ranges)
+        assert min(trace.plan_time, trace.copy_time, trace.insert_time) >= 0
+
+
+def test_process_tracer_segments(example_stream):
+    traces = []
+    minimalism.additive_process(example_stream, iterations_end=3, tracer=traces.append)
+    assert [(trace.ranges, trace.notes, trace.offset) for trace in traces] == [
+        (((0, 1),), 1, 1.0),
+        (((0, 2),), 2, 3.0),
+        (((0, 3),), 3, 6.0),
+    ]
+
+
+def test_nested_process_tracer(example_stream):
+    with pytest.raises(TypeError):
+        minimalism.nested_process(
+            example_stream, functools.partial(minimalism.additive_process, tracer=print)
+        )
@@ -0,0 +1,76 @@
+import numpy as np
+import pytest
+from music21 import converter
+from music21 import chord
+from music21 import note
+from composer_toolkit.note_array import NoteArray
+
+
+@pytest.fixture
+def example_stream():
+    s = converter.parse("tinyNotation: C4 D#8 r8 E-4 G4").flatten()
+    s.append(chord.Chord(["G3", "B-3", "D4"], lyric="sol"))
+    s.append(note.Note("F~4"))
+    s.append(list(converter.parse("tinyNotation: trip{c8 d8 e8} B#2").flatten().notes))
+    s.notes[0].lyric = "la"
+    s.notes[2].lyric = "la"
+    return s
+
+
+def _describe(stream_):
+    return [
+        (
+            element.offset,
+            element.duration.quarterLength,
+            type(element).__name__,
+            [p.nameWithOctave for p in element.pitches],
+            element.lyric,
+        )
+        for element in stream_.flatten().notesAndRests
+    ]
+
+
+def test_note_array_round_trip(example_stream):
+    result = NoteArray.from_stream(example_stream).to_stream()
+    assert _describe(result) == _describe(example_stream)
+
+
+def test_note_array_from_stream(example_stream):
+    array = NoteArray.from_stream(example_stream)
+    assert len(array) == 13
+    assert array.event_count == 11
+    assert array.ps[:2].tolist() == [48.0, 51.0]
+    assert array.step[:4].tolist() == [0, 1, -1, 2]
+    assert np.isnan(array.alter[0]) and array.alter[1] == 1.0
+    assert array.rest.tolist()[:4] == [False, False, True, False]
+    assert array.chord.tolist()[4:9] == [False, True, True, True, False]
+    assert array.event.tolist()[4:9] == [4, 5, 5, 5, 6]
+    assert array.ps[8] == 65.5
+    assert array.lyrics == ["la", "sol"]
+    assert array.lyric[:6].tolist() == [0, -1, -1, 0, -1, 1]
+
+
+def test_note_array_vectorized_transposition(example_stream):
+    array = NoteArray.from_stream(example_stream)
+    array.ps += 12
+    result = array.to_stream()
+    intended_result = example_stream.flatten().transpose("P8")
+    assert [p.nameWithOctave for p in result.pitches] == [
+        p.nameWithOctave for p in intended_result.pitches
+    ]
+
+
+def test_note_array_invalid():
+    with pytest.raises(ValueError):
+        NoteArray([60.0], [0], [np.nan], [0.0], [1.0], [False], [False], [0, 1])
+    with pytest.raises(ValueError):
+        NoteArray(
+            [60.0, 62.0], [0, 1], [np.nan] * 2, [1.0, 0.0], [1.0] * 2, [False] * 2, [False] * 2, [1, 0]
+        )
+
+
+@pytest.mark.parametrize("element", [note.Unpitched(), chord.Chord()])
+def test_note_array_from_stream_without_pitches(example_stream, element):
+    example_stream.append(element)
+    with pytest.raises(ValueError):
+        NoteArray.from_stream(example_stream)
@@ -0,0 +1,96 @@
+import pytest
+from music21 import pitch
+from music21 import scale
+from composer_toolkit import scales
+
+
+@pytest.mark.parametrize(
+    "reference_scale",
+    [
+        scale.ChromaticScale("C"),
+        scale.MajorScale("B-"),
+        scale.MinorScale("F#"),
+        scales.PentatonicScale("D"),
+        scale.HarmonicMinorScale("G#"),
+        scale.OctatonicScale("D"),
+    ],
+)
+def test_scale_table_matches_next_pitch(reference_scale):
+    table = scales.scale_table(reference_scale)
+    for name in ["C4", "C#4", "F4", "A6", "E-3"]:
+        for steps in [-9, -2, -1, 1, 2, 9]:
+            direction = scale.Direction.ASCENDING if steps > 0 else scale.Direction.DESCENDING
+            intended_result = reference_scale.nextPitch(name, direction, abs(steps))
+            result = pitch.Pitch(name)
+            table.transpose_pitch(result, steps)
+            assert result.nameWithOctave == intended_result.nameWithOctave
+
+
+def test_scale_table_spelling():
+    table = scales.scale_table(scale.MajorScale("B-"))
+    index, in_scale = table.index(pitch.Pitch("E-5").ps)
+    assert in_scale
+    assert table.spelling(index) == ("E", 5, -1.0)
+    assert table.spelling(index + 5) == ("C", 6, None)
+    assert table.index(pitch.Pitch("E5").ps) == (index, False)
+
+
+def test_scale_table_distance():
+    table = scales.scale_table(scales.PentatonicScale("C"))
+    assert table.distance(pitch.Pitch("C4").ps, pitch.Pitch("G5").ps) == 8
+    assert table.distance(pitch.Pitch("G5").ps, pitch.Pitch("C4").ps) == -8
+    assert table.distance(pitch.Pitch("F4").ps, pitch.Pitch("G4").ps) == 1
+    assert table.distance(pitch.Pitch("F4").ps, pitch.Pitch("E4").ps) == -1
+    assert table.distance(pitch.Pitch("C4").ps, pitch.Pitch("F4").ps) is None
+
+
+def test_scale_table_descending_spelling():
+    table = scales.scale_table(scale.ChromaticScale("C"))
+    result = pitch.Pitch("B-4")
+    table.transpose_pitch(result, -2)
+    assert result.nameWithOctave == "G#4"
+    table.transpose_pitch(result, 1)
+    assert result.nameWithOctave == "A4"
+    table.transpose_pitch(result, -1)
+    table.transpose_pitch(result, -1)
+    table.transpose_pitch(result, 1)
+    assert result.nameWithOctave == "A-4"
+
+
+def test_scale_table_after_next_pitch():
+    # nextPitch can leave pitches of the wrong octave in the caches of the scale's network
+    reference_scale = scale.MajorScale("B-")
+    reference_scale.nextPitch("D4", scale.Direction.DESCENDING, 3)
+    table = scales.scale_table(reference_scale)
+    assert table.offsets == (0, 2, 4, 5, 7, 9, 11)
+
+
+def test_scale_table_crosses_octave_by_pitch_space():
+    # B#3 is C4, so one step up is D4 whatever the octave it is spelled in
+    result = pitch.Pitch("B#3")
+    scales.scale_table(scale.MajorScale("C")).transpose_pitch(result, 1)
+    assert result.nameWithOctave == "D4"
+
+
+def test_scale_table_crosses_octave_from_flat_spelling():
+    # B3 is spelled C- in D octatonic, but one step up is still above it
+    result = pitch.Pitch("B3")
+    scales.scale_table(scale.OctatonicScale("D")).transpose_pitch(result, 1)
+    assert result.nameWithOctave == "D-4"
+
+
+@pytest.mark.parametrize(
+    "reference_scale", [scale.WholeToneScale("C"), scale.WholeToneScale("D-")]
+)
+def test_scale_table_path_dependent_spelling(reference_scale):
+    # Whole-tone spellings depend on the degree nextPitch starts from, so there is no table
+    assert scales.scale_table(reference_scale) is None
+
+
+def test_scale_table_is_cached():
+    reference_scale = scale.MajorScale("G")
+    assert scales.scale_table(reference_scale) is scales.scale_table(reference_scale)
+
+
+def test_scale_table_directional_scale():
+    assert scales.scale_table(scale.MelodicMinorScale("C")) is None
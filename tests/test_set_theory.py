@@ -0,0 +1,82 @@
+import random
+
+import pytest
+from composer_toolkit import set_theory
+from music21 import chord
+
+
+def test_set_class_table_matches_music21():
+    table = set_theory.set_class_table()
+    assert len(table) == 4096
+    for mask in random.Random(0).sample(range(1, 4096), 60):
+        pcset = chord.Chord([pc for pc in range(12) if mask >> pc & 1])
+        entry = table[mask]
+        assert list(entry.normal_order) == pcset.normalOrder
+        assert list(entry.prime_form) == pcset.primeForm
+        assert entry.forte_class == pcset.forteClass
+        assert entry.forte_class_tni == pcset.forteClassTnI
+        assert list(entry.interval_vector) == pcset.intervalVector
+
+
+@pytest.mark.parametrize(
+    "pcset",
+    [[0, 3, 7], ["C", "E-", "G"], ["C4", "E-4", "G5"], chord.Chord("C4 E-4 G4"), [12, 15, 19]],
+)
+def test_pitch_class_mask(pcset):
+    assert set_theory.pitch_class_mask(pcset) == 0b10001001
+
+
+def test_forte_class():
+    assert set_theory.forte_class([0, 4, 7]) == "3-11B"
+    assert set_theory.forte_class(["C", "E-", "G"]) == "3-11A"
+    assert set_theory.set_class([0, 4, 7]).forte_class_tni == "3-11"
+
+
+def test_prime_form():
+    assert set_theory.prime_form([2, 6, 9]) == [0, 3, 7]
+
+
+def test_normal_order():
+    assert set_theory.normal_order(["B-4", "D5", "F5"]) == [10, 2, 5]
+    assert set_theory.normal_order(["B-4", "D5", "F5"], transposed=True) == [0, 4, 7]
+    assert set_theory.normal_order(chord.Chord("G#2 A2 D3 G3")) == [7, 8, 9, 2]
+
+
+def test_inverted():
+    assert set_theory.inverted([0, 4, 7]) == [5, 8, 0]
+    assert set_theory.inverted([0, 4, 7], transposed=True) == [0, 3, 7]
+
+
+def test_complement():
+    assert set_theory.complement(list(range(9))) == [9, 10, 11]
+    assert set_theory.complement([0, 2, 4, 5, 7, 9, 11], transposed=True) == [0, 2, 4, 7, 9]
+
+
+def test_t_operator():
+    assert set_theory.t_operator([0, 4, 7], [2, 6, 9]) == 2
+    assert set_theory.t_operator([2, 6, 9], [0, 4, 7]) == -2
+
+
+def test_results_do_not_share_the_table():
+    normal_order = set_theory.normal_order([0, 4, 7])
+    normal_order.append(11)
+    assert set_theory.normal_order([0, 4, 7]) == [0, 4, 7]
+
+
+def test_subsets():
+    assert set_theory.subsets([0, 1, 4, 6]) == ["3-3", "3-5", "3-7", "3-8"]
+    assert set_theory.subsets(["C4", "C5", "E4", "G4"]) == []
+    assert set_theory.subsets([0, 2, 4, 5, 7]) == [
+        "4-10", "4-11", "4-14", "4-22", "4-23", "3-2", "3-4", "3-6", "3-7", "3-9", "3-11"
+    ]
+
+
+def test_subsets_counts():
+    counts = set_theory.subsets([0, 2, 4, 5, 7, 9, 11], counts=True)
+    assert list(counts) == set_theory.subsets([0, 2, 4, 5, 7, 9, 11])
+    assert counts["3-11"] == 6
+    assert sum(counts.values()) == 2**7 - 1 - 1 - 7 - 21
+
+    aggregate = set_theory.subsets(list(range(12)), counts=True)
+    assert len(aggregate) == 215
+    assert sum(aggregate.values()) == 4096 - 1 - 1 - 12 - 66
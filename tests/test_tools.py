@@ -1,9 +1,19 @@
+import copy
+import timeit
+from fractions import Fraction
+
+import numpy as np
 import pytest
 from music21 import converter
 from music21 import pitch
 from music21 import note
+from music21 import chord
 from music21 import duration
+from music21 import spanner
+from music21 import tie
+from music21 import stream
 from composer_toolkit import tools
+from composer_toolkit.note_array import NoteArray
 
 
 @pytest.fixture
@@ -63,3 +73,246 @@ def test_pitches_to_stream(pitches_stream, sequence):
 def test_durations_to_stream(durations_stream, sequence):
     result = tools.durations_to_stream(sequence)
     assert list(result.flat.notes) == list(durations_stream.flat.notes)
+
+
+def test_notes_to_stream_copies():
+    first_result = tools.notes_to_stream(["C4", 61])
+    first_result.notes[0].pitch.octave = 5
+    first_result.notes[1].duration.quarterLength = 2
+    second_result = tools.notes_to_stream(["C4", 61])
+    assert [n.nameWithOctave for n in second_result.notes] == ["C4", "C#4"]
+    assert [n.offset for n in second_result.notes] == [0.0, 1.0]
+    assert second_result.notes[1].duration.quarterLength == 1
+    assert second_result.notes[0] is not first_result.notes[0]
+
+
+def test_arrays_to_stream(pitches_stream):
+    durations = np.array([2, 4, 1, 0.5, 1 / 3])
+    result = tools.arrays_to_stream(np.array([48, 50, 52, 54, 55]), durations)
+    assert list(result.pitches) == list(pitches_stream.pitches)
+    assert [n.duration.quarterLength for n in result.notes] == [2, 4, 1, 0.5, Fraction(1, 3)]
+    assert [n.offset for n in result.notes] == [0, 2, 6, 7, 7.5]
+
+
+def test_arrays_to_stream_rests():
+    result = tools.arrays_to_stream([60, np.nan, 62], 0.5)
+    assert [(n.name, n.offset) for n in result.notesAndRests] == [
+        ("C", 0.0),
+        ("rest", 0.5),
+        ("D", 1.0),
+    ]
+    with pytest.raises(ValueError):
+        tools.arrays_to_stream([60, 62], [1, 2, 3])
+
+
+@pytest.fixture
+def concatenation_streams():
+    return [
+        converter.parse("tinyNotation: C4 D8 E8"),
+        converter.parse("tinyNotation: r4 F2").flatten(),
+        converter.parse("tinyNotation: G4. A8"),
+    ]
+
+
+def test_append_stream(concatenation_streams):
+    original_stream = converter.parse("tinyNotation: c2 d2").flatten()
+    tools.append_stream(original_stream, *concatenation_streams)
+    assert [(n.name, n.offset) for n in original_stream.flatten().notesAndRests] == [
+        ("C", 0.0),
+        ("D", 2.0),
+        ("C", 4.0),
+        ("D", 5.0),
+        ("E", 5.5),
+        ("rest", 6.0),
+        ("F", 7.0),
+        ("G", 9.0),
+        ("A", 10.5),
+    ]
+    assert original_stream.highestTime == 11.0
+
+
+def test_concatenate_streams(concatenation_streams):
+    result = tools.concatenate_streams(*concatenation_streams)
+    intended_result = stream.Stream()
+    for stream_ in concatenation_streams:
+        for element in stream_.flatten().notesAndRests:
+            intended_result.append(element)
+    assert [(n.name, n.offset) for n in result.flatten().notesAndRests] == [
+        (n.name, n.offset) for n in intended_result.notesAndRests
+    ]
+    assert result.highestTime == intended_result.highestTime
+
+
+def test_concatenate_streams_stream_class(concatenation_streams):
+    result = tools.concatenate_streams(*concatenation_streams, stream_class=stream.Part)
+    assert isinstance(result, stream.Part)
+
+
+def test_clone_note():
+    original_note = note.Note("C#4", quarterLength=1.5)
+    original_note.lyric = "la"
+    original_note.tie = tie.Tie("start")
+    original_stream = stream.Stream([original_note])
+    result = tools.clone(original_note)
+    assert result == original_note
+    assert result.lyric == "la"
+    assert original_stream not in result.sites
+
+    result.pitch.transpose(2, inPlace=True)
+    result.pitch.accidental.displayStatus = True
+    result.duration.quarterLength = 3
+    result.lyric = "sol"
+    result.tie.type = "stop"
+    assert original_note.nameWithOctave == "C#4"
+    assert original_note.pitch.accidental.displayStatus is None
+    assert original_note.duration.quarterLength == 1.5
+    assert original_note.lyric == "la"
+    assert original_note.tie.type == "start"
+
+
+def test_clone_chord():
+    original_chord = chord.Chord(["C4", "E-4", "G4"], quarterLength=2)
+    result = tools.clone(original_chord)
+    assert result.pitches == original_chord.pitches
+    assert all(chord_note._chordAttached is result for chord_note in result.notes)
+    result.notes[1].pitch.accidental = None
+    result.duration.quarterLength = 1
+    assert original_chord.pitches[1].name == "E-"
+    assert original_chord.duration.quarterLength == 2
+
+
+def test_clone_stream():
+    original_stream = converter.parse("tinyNotation: 3/4 C4 D#8 r8 E-4 trip{c8 d8 e8} B#2")
+    result = tools.clone(original_stream)
+    original_elements = list(original_stream.recurse())
+    result_elements = list(result.recurse())
+    assert [(type(e), e.getOffsetInHierarchy(result)) for e in result_elements] == [
+        (type(e), e.getOffsetInHierarchy(original_stream)) for e in original_elements
+    ]
+    assert [repr(n) for n in result.recurse().notesAndRests] == [
+        repr(n) for n in original_stream.recurse().notesAndRests
+    ]
+    assert [n.duration.quarterLength for n in result.recurse().notesAndRests] == [
+        n.duration.quarterLength for n in original_stream.recurse().notesAndRests
+    ]
+    assert not any(
+        original is copy_ for original in original_elements for copy_ in result_elements
+    )
+
+    for n in result.recurse().notes:
+        n.pitch.octave = 6
+    result.measure(1).insert(0, note.Note("A4"))
+    assert [p.octave for p in original_stream.pitches] == [3, 3, 3, 4, 4, 4, 3]
+    assert len(original_stream.measure(1).notes) == 3
+
+
+def test_clone_stream_with_spanners():
+    original_stream = converter.parse("tinyNotation: C4 D4 E4")
+    notes = list(original_stream.recurse().notes)
+    original_stream.insert(0, spanner.Slur(notes[0], notes[2]))
+    result = tools.clone(original_stream)
+    slur = result.recurse().getElementsByClass(spanner.Slur).first()
+    assert slur.getFirst() is result.recurse().notes.first()
+
+
+def test_clone_beamed_stream():
+    original_stream = stream.Stream(
+        [note.Note(60 + index % 12, quarterLength=0.5) for index in range(800)]
+    )
+    original_stream.makeNotation(inPlace=True)
+    result = tools.clone(original_stream)
+    original_beams = [n.beams for n in original_stream.recurse().notes]
+    result_beams = [n.beams for n in result.recurse().notes]
+    assert result_beams == original_beams
+    assert all(len(beams) == 1 for beams in result_beams)
+    assert not any(
+        copy_ is original or copy_.beamsList[0] is original.beamsList[0]
+        for copy_, original in zip(result_beams, original_beams)
+    )
+
+    result_beams[0].beamsList[0].type = "stop"
+    assert original_beams[0].beamsList[0].type == "start"
+
+    # Expected to be at least five times as fast; the margin keeps the test stable
+    clone_time = min(timeit.repeat(lambda: tools.clone(original_stream), number=1, repeat=5))
+    deepcopy_time = min(
+        timeit.repeat(lambda: copy.deepcopy(original_stream), number=1, repeat=5)
+    )
+    assert clone_time * 3 < deepcopy_time
+
+
+@pytest.mark.parametrize(
+    "notation, intended_result",
+    [
+        ("r4 C4 r8 r8 D2 r4", [("rest", 0.0, 1.0), ("C", 1.0, 2.0), ("D", 3.0, 3.0)]),
+        ("C4 D4 E4", [("C", 0.0, 1.0), ("D", 1.0, 1.0), ("E", 2.0, 1.0)]),
+        ("r2 r4", [("rest", 0.0, 2.0), ("rest", 2.0, 1.0)]),
+    ],
+)
+def test_augment_into_rests(notation, intended_result):
+    original_stream = converter.parse(f"tinyNotation: {notation}").flatten()
+    (result,) = tools.augment_into_rests(original_stream)
+    assert [(n.name, n.offset, n.duration.quarterLength) for n in result.notesAndRests] == (
+        intended_result
+    )
+    assert len(original_stream.notesAndRests) == len(notation.split())
+
+
+def test_augment_into_rests_voices():
+    voices = [
+        converter.parse("tinyNotation: C4 r4 E4 r4").flatten(),
+        converter.parse("tinyNotation: r4 D4 r4 F4").flatten(),
+    ]
+    voices[0].insert(4.0, chord.Chord(["C4", "E4"]))
+    voices[0].insert(5.0, note.Rest())
+    results = tools.augment_into_rests(*voices, in_place=True)
+    assert results[0] is voices[0]
+    assert [(n.offset, n.duration.quarterLength) for n in voices[0].notesAndRests] == [
+        (0.0, 2.0),
+        (2.0, 2.0),
+        (4.0, 2.0),
+    ]
+    assert [(n.offset, n.duration.quarterLength) for n in voices[1].notesAndRests] == [
+        (0.0, 1.0),
+        (1.0, 2.0),
+        (3.0, 1.0),
+    ]
+
+
+def test_augment_into_rests_note_array():
+    original_stream = converter.parse("tinyNotation: r4 C4 r8 r8 D2 r4 E4").flatten()
+    original_stream.insert(7.0, chord.Chord(["C4", "E4"]))
+    original_stream.insert(8.0, note.Rest(quarterLength=2))
+    array = NoteArray.from_stream(original_stream)
+    (result,) = tools.augment_into_rests(array)
+    (intended_result,) = tools.augment_into_rests(original_stream)
+    assert result is not array
+    assert len(array) == 10
+    assert [
+        (n.pitches, n.offset, n.duration.quarterLength) for n in result.to_stream().notesAndRests
+    ] == [(n.pitches, n.offset, n.duration.quarterLength) for n in intended_result.notesAndRests]
+
+
+def test_convert_stream_in_place(pitches_stream):
+    original_stream = pitches_stream.flatten()
+    notes = list(original_stream.notes)
+    result = tools.convert_stream(original_stream, stream.Voice, in_place=True)
+    assert result is original_stream
+    assert isinstance(result, stream.Voice)
+    assert list(result.notes) == notes
+    assert tools.convert_stream(result, stream.Part, in_place=True).partName is None
+
+
+def test_streams_to_score_in_place(pitches_stream, durations_stream):
+    streams = [pitches_stream.flatten(), durations_stream.flatten()]
+    notes = [list(s.notes) for s in streams]
+    intended_result = tools.streams_to_score(*(tools.clone(s) for s in streams))
+    result = tools.streams_to_score(*streams, in_place=True)
+    assert list(result.parts) == streams
+    assert [list(part.notes) for part in result.parts] == notes
+    assert [
+        [(n.offset, n.duration.quarterLength) for n in part.notes] for part in result.parts
+    ] == [
+        [(n.offset, n.duration.quarterLength) for n in part.notes]
+        for part in intended_result.parts
+    ]
@@ -1,7 +1,16 @@
+import concurrent.futures
+import random
+
+import numpy as np
 import pytest
 from composer_toolkit import transformations
 from composer_toolkit import scales
+from composer_toolkit.note_array import NoteArray
+from music21 import chord
 from music21 import converter
+from music21 import note
+from music21 import scale
+from music21 import stream
 
 
 @pytest.fixture
@@ -89,3 +98,327 @@ def test_retrograde_in_place(major_scale):
     transformations.retrograde(major_scale, in_place=True)
     intended_result = converter.parse("tinyNotation: c B A G F E D C")
     assert list(major_scale.flat.notes) == list(intended_result.flat.notes)
+
+
+def test_scalar_transposition_directional_scale(major_scale):
+    result = transformations.scalar_transposition(
+        major_scale, -1, reference_scale=scale.MelodicMinorScale("C")
+    )
+    intended_result = converter.parse("tinyNotation: BB- C E- E- F A- B- B-")
+    assert list(result.flat.notes) == list(intended_result.flat.notes)
+
+
+@pytest.mark.parametrize(
+    "reference_scale, names, steps, intended_names",
+    [
+        (scale.WholeToneScale("C"), ["F#4", "G#4"], -1, ["E4", "F#4"]),
+        (scale.WholeToneScale("C"), ["A#4"], 1, ["B#4"]),
+        (scale.WholeToneScale("D-"), ["A4"], 2, ["C#5"]),
+    ],
+)
+def test_scalar_transposition_path_dependent_spelling(
+    reference_scale, names, steps, intended_names
+):
+    original_stream = stream.Stream([note.Note(name) for name in names])
+    result = transformations.scalar_transposition(original_stream, steps, reference_scale)
+    assert _pitch_names(result) == intended_names
+
+
+def test_scalar_inversion_wide_register():
+    original_stream = converter.parse("tinyNotation: CCC c'''' FF# e'")
+    result = transformations.scalar_inversion(
+        original_stream, "C4", reference_scale=scale.MajorScale("C")
+    )
+    # F# is not in the scale and is left as it is
+    intended_result = converter.parse("tinyNotation: c''' CCCC FF# AA")
+    assert list(result.flat.notes) == list(intended_result.flat.notes)
+
+
+def test_scalar_inversion_directional_scale(pentatonic_scale):
+    result = transformations.scalar_inversion(
+        pentatonic_scale, "C4", reference_scale=scale.MelodicMinorScale("C")
+    )
+    intended_result = converter.parse("tinyNotation: c' b E f A c")
+    assert list(result.flat.notes) == list(intended_result.flat.notes)
+
+
+def test_retrograde_rests_and_chords():
+    original_stream = converter.parse("tinyNotation: 4/4 C4 r8 D8 E2 r2 F2")
+    original_stream.measure(2).insert(0, chord.Chord(["G3", "B3"], quarterLength=2))
+    result = transformations.retrograde(original_stream)
+    elements = [
+        (float(n.offset), n.fullName if n.isRest else [p.nameWithOctave for p in n.pitches])
+        for n in result.notesAndRests
+    ]
+    assert elements == [
+        (0.0, ["F3"]),
+        (2.0, "Half Rest"),
+        (2.0, ["G3", "B3"]),
+        (4.0, ["E3"]),
+        (6.0, ["D3"]),
+        (6.5, "Eighth Rest"),
+        (7.0, ["C3"]),
+    ]
+    assert not result.getElementsByClass("Measure")
+    assert original_stream.measure(1).notesAndRests[0].nameWithOctave == "C3"
+
+
+def test_retrograde_ties():
+    original_stream = converter.parse("tinyNotation: C2~ C4 D4")
+    result = transformations.retrograde(original_stream)
+    assert [n.tie.type if n.tie else None for n in result.notes] == [None, "start", "stop"]
+
+
+def test_retrograde_make_measures():
+    original_stream = converter.parse("tinyNotation: 3/4 C4 D4 E4 F2 G4 A4 B4 c4")
+    result = transformations.retrograde(original_stream, make_measures=True)
+    measures = result.getElementsByClass("Measure")
+    assert len(measures) == 3
+    assert [n.nameWithOctave for n in measures[0].notes] == ["C4", "B3", "A3"]
+    assert [n.nameWithOctave for n in measures[1].notes] == ["G3", "F3"]
+    assert result.recurse().getElementsByClass("TimeSignature")[0].ratioString == "3/4"
+
+
+def test_retrograde_note_array(major_scale):
+    result = transformations.retrograde(NoteArray.from_stream(major_scale)).to_stream()
+    intended_result = converter.parse("tinyNotation: c B A G F E D C")
+    assert list(result.notes) == list(intended_result.flatten().notes)
+
+
+# Pitch Array Tests
+
+
+@pytest.mark.parametrize(
+    "operation",
+    [
+        lambda s: transformations.scalar_transposition(s, 3),
+        lambda s: transformations.scalar_transposition(
+            s, -4, reference_scale=scales.PentatonicScale("C")
+        ),
+        lambda s: transformations.scalar_inversion(s, "C4"),
+        lambda s: transformations.scalar_inversion(
+            s, "F4", reference_scale=scale.MajorScale("C")
+        ),
+        lambda s: transformations.octave_shift(s, -2),
+    ],
+)
+def test_transformations_on_arrays(major_scale, operation):
+    major_scale.append(note.Rest())
+    major_scale.append(chord.Chord(["C4", "E-4", "G4"]))
+    intended_result = operation(major_scale)
+
+    ps_result = operation(np.array([p.ps for p in major_scale.flatten().pitches]))
+    assert ps_result.tolist() == [p.ps for p in intended_result.flatten().pitches]
+
+    note_array = NoteArray.from_stream(major_scale)
+    array_result = operation(note_array).to_stream()
+    assert [p.nameWithOctave for p in array_result.pitches] == [
+        p.nameWithOctave for p in intended_result.flatten().pitches
+    ]
+    assert np.array_equal(note_array.ps, NoteArray.from_stream(major_scale).ps, equal_nan=True)
+
+
+def test_transformations_on_arrays_in_place():
+    ps = np.array([60.0, 62.0, np.nan, 64.0])
+    result = transformations.scalar_transposition(
+        ps, 1, reference_scale=scale.MajorScale("C"), in_place=True
+    )
+    assert result is ps
+    assert ps[[0, 1, 3]].tolist() == [62.0, 64.0, 65.0]
+    assert np.isnan(ps[2])
+
+
+def test_transformations_on_arrays_directional_scale():
+    with pytest.raises(ValueError):
+        transformations.scalar_transposition(
+            np.array([60.0]), 1, reference_scale=scale.MelodicMinorScale("C")
+        )
+
+
+def test_spell_array():
+    step, alter = transformations.spell_array(
+        np.array([61.0, 61.0, 68.0, 61.5, np.nan]),
+        descending=np.array([False, True, True, False, False]),
+    )
+    assert step.tolist() == [0, 0, 4, 0, -1]
+    assert alter.tolist()[:4] == [1.0, 1.0, 1.0, 1.5]
+    assert np.isnan(alter[4])
+
+
+# Transformation Chain Tests
+
+
+def _pitch_names(s):
+    return [p.nameWithOctave for p in s.flatten().pitches]
+
+
+@pytest.mark.parametrize(
+    "operations",
+    [
+        [("retrograde",), ("scalar_inversion", "D3", scale.MajorScale("D"))],
+        [
+            ("scalar_transposition", 2, scales.PentatonicScale("C")),
+            ("octave_shift", 1),
+            ("octave_shift", -2),
+            ("scalar_inversion", "C4"),
+            ("scalar_transposition", -3),
+        ],
+        [("retrograde",), ("scalar_transposition", 1), ("retrograde",)],
+        [("scalar_inversion", "E4", scale.MelodicMinorScale("C")), ("retrograde",)],
+    ],
+)
+def test_transformation_chain(major_scale, operations):
+    chain = transformations.TransformationChain()
+    intended_result = major_scale
+    for name, *arguments in operations:
+        chain = getattr(chain, name)(*arguments)
+        intended_result = getattr(transformations, name)(intended_result, *arguments)
+
+    result = chain.apply(major_scale)
+    assert _pitch_names(result) == _pitch_names(intended_result)
+    assert _pitch_names(major_scale) == _pitch_names(converter.parse("tinyNotation: C D E F G A B c"))
+
+
+def test_transformation_chain_is_immutable():
+    chain = transformations.TransformationChain().retrograde()
+    longer_chain = chain.octave_shift(1)
+    assert len(chain) == 1
+    assert len(longer_chain) == 2
+
+
+def test_transformation_chain_in_place(major_scale):
+    chain = transformations.TransformationChain().octave_shift(1).retrograde()
+    result = chain.apply(major_scale, in_place=True)
+    assert result is major_scale
+    assert _pitch_names(major_scale) == _pitch_names(
+        converter.parse("tinyNotation: c' b a g f e d c")
+    )
+
+
+def test_transformation_chain_on_note_array(major_scale):
+    major_scale.append(chord.Chord(["C4", "E4"], quarterLength=2))
+    major_scale.insert(0, note.Rest())
+    chain = (
+        transformations.TransformationChain()
+        .scalar_inversion("C4", scale.MajorScale("C"))
+        .retrograde()
+    )
+    result = chain.apply(NoteArray.from_stream(major_scale)).to_stream()
+    intended_result = converter.parse("tinyNotation: c B A G F E D C")
+    assert [p.nameWithOctave for p in result.pitches] == ["C4", "A3"] + _pitch_names(
+        transformations.scalar_inversion(intended_result, "C4", scale.MajorScale("C"))
+    )
+    assert [float(n.offset) for n in result.notesAndRests][:2] == [0.0, 2.0]
+
+
+# Row Form Tests
+
+
+@pytest.fixture
+def twelve_tone_row():
+    return converter.parse("tinyNotation: c e- b- d' a- g d# e f# f' g# c#")
+
+
+def test_row_forms(twelve_tone_row):
+    forms = transformations.row_forms(twelve_tone_row)
+    assert len(forms) == 48
+    for level in range(12):
+        prime = transformations.scalar_transposition(twelve_tone_row, level)
+        inversion = transformations.scalar_transposition(
+            transformations.scalar_inversion(twelve_tone_row, "C4"), level
+        )
+        assert _pitch_names(forms[f"P{level}"]) == _pitch_names(prime)
+        assert _pitch_names(forms[f"I{level}"]) == _pitch_names(inversion)
+        assert _pitch_names(forms[f"R{level}"]) == _pitch_names(
+            transformations.retrograde(prime)
+        )
+        assert _pitch_names(forms[f"RI{level}"]) == _pitch_names(
+            transformations.retrograde(inversion)
+        )
+    assert forms["RI4"] is forms["RI4"]
+
+
+def test_row_forms_arrays(twelve_tone_row):
+    forms = transformations.row_forms(
+        twelve_tone_row,
+        reference_scale=scale.MajorScale("C"),
+        inversion_axis="E4",
+        transpositions=[-2, 3],
+        forms=["I", "R"],
+        as_arrays=True,
+    )
+    assert list(forms) == ["I-2", "I3", "R-2", "R3"]
+    for name, intended_result in [
+        ("I-2", transformations.scalar_transposition(
+            transformations.scalar_inversion(twelve_tone_row, "E4", scale.MajorScale("C")),
+            -2,
+            scale.MajorScale("C"),
+        )),
+        ("R3", transformations.retrograde(
+            transformations.scalar_transposition(twelve_tone_row, 3, scale.MajorScale("C"))
+        )),
+    ]:
+        assert isinstance(forms[name], NoteArray)
+        assert _pitch_names(forms[name].to_stream()) == _pitch_names(intended_result)
+
+    ps_forms = transformations.row_forms(np.array([60.0, 63.0, 70.0]))
+    assert ps_forms["RI2"].tolist() == [52.0, 59.0, 62.0]
+
+
+def test_row_forms_invalid(twelve_tone_row):
+    with pytest.raises(ValueError):
+        transformations.row_forms(twelve_tone_row, forms=["P", "X"])
+    with pytest.raises(ValueError):
+        transformations.row_forms(twelve_tone_row, reference_scale=scale.MelodicMinorScale("C"))
+
+
+# Concurrency Tests
+
+
+def _concurrent_tasks(source, pentatonic, major, melodic_minor):
+    chain = (
+        transformations.TransformationChain()
+        .scalar_inversion("E4", reference_scale=major)
+        .scalar_transposition(-3, reference_scale=pentatonic)
+        .retrograde()
+    )
+    return [
+        lambda: transformations.scalar_transposition(source, 2, pentatonic),
+        lambda: transformations.scalar_transposition(source, -5, major),
+        lambda: transformations.scalar_inversion(source, "G4", major),
+        lambda: transformations.scalar_transposition(source, 3, melodic_minor),
+        lambda: transformations.scalar_inversion(source, "A4", melodic_minor),
+        lambda: chain.apply(source),
+        lambda: transformations.retrograde(source),
+        lambda: transformations.row_forms(source, major)["RI5"],
+    ]
+
+
+def test_concurrent_transformations():
+    source = converter.parse("tinyNotation: 4/4 c8 d e- f# g4 a- b c'2 r4 <a c' e'>4 B- G#")
+    intended_results = [
+        _pitch_names(task())
+        for task in _concurrent_tasks(
+            source,
+            scales.PentatonicScale("C"),
+            scale.MajorScale("C"),
+            scale.MelodicMinorScale("A"),
+        )
+    ]
+
+    # The scales are shared by all threads, and used for the first time concurrently
+    tasks = _concurrent_tasks(
+        source,
+        scales.PentatonicScale("C"),
+        scale.MajorScale("C"),
+        scale.MelodicMinorScale("A"),
+    )
+    runs = [index for index in range(len(tasks)) for _ in range(6)]
+    random.Random(0).shuffle(runs)
+    with concurrent.futures.ThreadPoolExecutor(max_workers=8) as executor:
+        results = list(executor.map(lambda index: _pitch_names(tasks[index]()), runs))
+    for index, result in zip(runs, results):
+        assert result == intended_results[index]
+    assert _pitch_names(source) == _pitch_names(
+        converter.parse("tinyNotation: 4/4 c8 d e- f# g4 a- b c'2 r4 <a c' e'>4 B- G#")
+    )